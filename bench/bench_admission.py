@@ -0,0 +1,114 @@
+"""Open-loop overload test for perf/admission.py.
+
+    python bench/bench_admission.py --capacity 4 --service-ms 20 --seconds 5
+
+The demo apps' handlers take microseconds, so in-process they can't be pushed
+past saturation without saturating the load generator too. Instead this
+mounts AdmissionMiddleware, configured the way the apps configure it, on an
+endpoint backed by a fixed-size "DB pool": `capacity` slots, `service-ms`
+each. Requests arrive as a Poisson process at multiples of that capacity,
+with and without admission control. We report p50/p99 of accepted requests
+and the share shed with 503.
+"""
+import argparse
+import asyncio
+import os
+import random
+import sys
+import time
+
+import httpx
+from fastapi import FastAPI
+
+sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+from perf.admission import AdmissionMiddleware  # noqa: E402
+
+
+def make_app(capacity: int, service: float, admission: bool, target_wait: float) -> FastAPI:
+    app = FastAPI()
+    pool = asyncio.Semaphore(capacity)
+
+    @app.get("/work")
+    async def work():
+        async with pool:
+            await asyncio.sleep(service)
+        return {"ok": True}
+
+    if admission:
+        app.add_middleware(
+            AdmissionMiddleware,
+            concurrency={"default": capacity},
+            target_wait=target_wait,
+            max_wait=4 * target_wait,
+        )
+    return app
+
+
+def pct(values: list[float], q: float) -> float:
+    if not values:
+        return float("nan")
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+async def open_loop(app: FastAPI, rps: float, seconds: float, seed: int) -> dict:
+    rnd = random.Random(seed)
+    latencies: list[float] = []
+    statuses: dict[int, int] = {}
+
+    async def one(client: httpx.AsyncClient) -> None:
+        start = time.perf_counter()
+        resp = await client.get("/work")
+        statuses[resp.status_code] = statuses.get(resp.status_code, 0) + 1
+        if resp.status_code == 200:
+            latencies.append(time.perf_counter() - start)
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        tasks = []
+        deadline = time.perf_counter() + seconds
+        next_at = time.perf_counter()
+        while next_at < deadline:
+            next_at += rnd.expovariate(rps)
+            delay = next_at - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            tasks.append(asyncio.create_task(one(client)))
+        await asyncio.gather(*tasks)
+
+    sent = sum(statuses.values())
+    return {
+        "sent": sent,
+        "ok": statuses.get(200, 0),
+        "shed": statuses.get(503, 0) / sent if sent else 0.0,
+        "p50_ms": pct(latencies, 0.50) * 1000,
+        "p99_ms": pct(latencies, 0.99) * 1000,
+    }
+
+
+async def main() -> None:
+    p = argparse.ArgumentParser()
+    p.add_argument("--capacity", type=int, default=4)
+    p.add_argument("--service-ms", type=float, default=20.0)
+    p.add_argument("--seconds", type=float, default=5.0)
+    p.add_argument("--target-wait-ms", type=float, default=50.0)
+    p.add_argument("--loads", default="0.5,0.9,1.2,1.5,2,3", help="multiples of capacity")
+    p.add_argument("--seed", type=int, default=1)
+    args = p.parse_args()
+
+    service = args.service_ms / 1000
+    capacity_rps = args.capacity / service
+    print(f"capacity={capacity_rps:.0f} rps  target_wait={args.target_wait_ms:.0f}ms  "
+          f"max_wait={4 * args.target_wait_ms:.0f}ms")
+    print(f"{'load':>5s} {'mode':>10s} {'sent':>6s} {'ok':>6s} {'shed':>6s} {'p50 ms':>9s} {'p99 ms':>9s}")
+    for load in (float(x) for x in args.loads.split(",")):
+        for admission in (False, True):
+            app = make_app(args.capacity, service, admission, args.target_wait_ms / 1000)
+            r = await open_loop(app, load * capacity_rps, args.seconds, args.seed)
+            mode = "admission" if admission else "none"
+            print(f"{load:5.1f} {mode:>10s} {r['sent']:6d} {r['ok']:6d} {r['shed']:6.1%} "
+                  f"{r['p50_ms']:9.1f} {r['p99_ms']:9.1f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
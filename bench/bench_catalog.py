@@ -0,0 +1,90 @@
+"""Filter latency of the 7-query.py catalog (fastapi/catalog.py).
+
+    python bench/bench_catalog.py                 # 10M items
+    python bench/bench_catalog.py --items 1000000
+
+Times, for the same data:
+
+- /tags/ with 3 tags: bitmap AND + first page, vs dense boolean masks
+  (one bool column per tag, ANDed, then flatnonzero)
+- /search/ prefix lookups
+- a deep page: keyset (after=<id>) vs skip/limit over the filtered rows
+
+Build takes a while at 10M (the generator runs in Python); build time, index
+size and the size of the equivalent dense masks are printed first.
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "fastapi"))
+from catalog import generate  # noqa: E402
+
+FILTERS = [["red", "sale", "new"], ["blue", "bestseller", "gift"], ["black", "limited", "eco"]]
+QUERIES = ["blu", "smart red", "pro bl ke", "vintage yellow watch"]
+
+
+def timed(fn, repeat: int):
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        out = fn()
+        best = min(best, time.perf_counter() - t0)
+    return out, best * 1000
+
+
+def dense_masks(cat, tags: set[str]) -> dict[str, np.ndarray]:
+    rows = np.repeat(np.arange(len(cat)), np.diff(cat._tag_off))
+    masks = {}
+    for tag in tags:
+        mask = np.zeros(len(cat), dtype=bool)
+        mask[rows[cat._tag_codes == cat.tag_names.index(tag)]] = True
+        masks[tag] = mask
+    return masks
+
+
+def main() -> None:
+    p = argparse.ArgumentParser()
+    p.add_argument("--items", type=int, default=10_000_000)
+    p.add_argument("--limit", type=int, default=10)
+    p.add_argument("--repeat", type=int, default=5)
+    args = p.parse_args()
+
+    t0 = time.perf_counter()
+    cat = generate(args.items)
+    print(f"items={len(cat):,} build={time.perf_counter() - t0:.1f}s "
+          f"index={cat.index_nbytes / 1e6:.1f}MB "
+          f"(dense bool mask per tag would be {len(cat.tag_names) * len(cat) / 1e6:.0f}MB)")
+
+    masks = dense_masks(cat, {t for f in FILTERS for t in f})
+    print("\n3-tag filter + first page (best of %d)" % args.repeat)
+    for tags in FILTERS:
+        match, bitmap_ms = timed(lambda: cat.with_tags(tags), args.repeat)
+        _, page_ms = timed(lambda: cat.page(match, None, args.limit), args.repeat)
+        rows, mask_ms = timed(lambda: np.flatnonzero(masks[tags[0]] & masks[tags[1]] & masks[tags[2]]),
+                              args.repeat)
+        assert len(match) == rows.size
+        print(f"  {'+'.join(tags):24s} hits={len(match):>9,}  bitmap AND={bitmap_ms:7.2f}ms "
+              f"page={page_ms:6.2f}ms  dense masks={mask_ms:7.2f}ms")
+
+    print("\nprefix search (best of %d)" % args.repeat)
+    for q in QUERIES:
+        match, ms = timed(lambda: cat.matching(q), args.repeat)
+        print(f"  q={q!r:24s} hits={len(match):>9,}  {ms:7.2f}ms")
+
+    print("\ndeep page of red+sale+new")
+    match = cat.with_tags(FILTERS[0])
+    offset = len(match) - args.limit  # the last page
+    after = int(cat.ids[match.rows_from(0, offset)[-1]])
+    keyset, keyset_ms = timed(lambda: cat.page(match, after, args.limit)[0], args.repeat)
+    skip, skip_ms = timed(lambda: [cat.item(int(r)) for r in
+                                   match.rows_from(0, offset + args.limit)[offset:]], args.repeat)
+    assert keyset == skip
+    print(f"  offset={offset:,}: keyset after={after}: {keyset_ms:.2f}ms  skip/limit: {skip_ms:.2f}ms")
+
+
+if __name__ == "__main__":
+    main()
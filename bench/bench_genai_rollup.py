@@ -0,0 +1,99 @@
+"""Full-scan GenAI report vs the trigger-maintained rollups (sql/genai_rollup.py).
+
+    python bench/bench_genai_rollup.py                  # 50M raw rows
+    python bench/bench_genai_rollup.py --rows 1000000 --db :memory:
+
+Loads rows through the rollup triggers, then times the original query against
+the rollup read and checks they agree. The trigger cost is shown by loading a
+slice of the same rows into a table without triggers.
+"""
+import argparse
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "sql"))
+from genai_rollup import GenAIRollup  # noqa: E402
+
+TOOLS = ["ChatGPT", "Copilot", "Gemini", "Claude", "Llama", None]
+
+
+def generate(n: int, seed: int, years: int, companies: int):
+    rnd = random.Random(seed)
+    for _ in range(n):
+        yield (
+            2015 + rnd.randrange(years),
+            f"C{rnd.randrange(companies)}",
+            rnd.randrange(1, 40),
+            rnd.choice(TOOLS),
+        )
+
+
+def batched(rows, size: int):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def timed(fn, repeat: int = 1):
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        out = fn()
+        best = min(best, time.perf_counter() - t0)
+    return out, best
+
+
+def main() -> None:
+    p = argparse.ArgumentParser()
+    p.add_argument("--rows", type=int, default=50_000_000)
+    p.add_argument("--batch", type=int, default=100_000)
+    p.add_argument("--years", type=int, default=10)
+    p.add_argument("--companies", type=int, default=50_000)
+    p.add_argument("--seed", type=int, default=7)
+    p.add_argument("--db", default=None, help="sqlite path (default: temp file)")
+    args = p.parse_args()
+
+    path = args.db or os.path.join(tempfile.mkdtemp(), "genai.db")
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=OFF")
+    rollup = GenAIRollup(conn)
+    rollup.install()
+
+    # trigger overhead on a slice: plain table vs genai with triggers
+    sample = list(generate(min(args.rows, 1_000_000), args.seed + 1, args.years, args.companies))
+    conn.execute("CREATE TEMP TABLE genai_plain AS SELECT * FROM genai WHERE 0")
+    _, t_plain = timed(lambda: conn.executemany("INSERT INTO genai_plain VALUES (?, ?, ?, ?)", sample))
+    conn.execute("DROP TABLE genai_plain")
+    conn.commit()
+
+    t0 = time.perf_counter()
+    for batch in batched(generate(args.rows, args.seed, args.years, args.companies), args.batch):
+        rollup.insert_many(batch)
+    t_load = time.perf_counter() - t0
+    print(f"rows={args.rows:,} db={path}")
+    print(f"load with triggers : {t_load:8.2f}s  ({args.rows / t_load:,.0f} rows/s)")
+    print(f"plain insert slice : {len(sample) / t_plain:,.0f} rows/s (no triggers)")
+
+    raw, t_raw = timed(rollup.report_from_raw)
+    fast, t_fast = timed(rollup.report, repeat=5)
+    print(f"original query     : {t_raw * 1000:10.1f} ms")
+    print(f"rollup read        : {t_fast * 1000:10.3f} ms  ({t_raw / t_fast:,.0f}x)")
+
+    problems = rollup.check_consistency()
+    print("consistency        :", "ok" if not problems else problems)
+    for row in fast:
+        print("  ", row)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+"""Overhead of perf/instrumentation.py with profiling off.
+
+    python bench/bench_instrumentation.py --requests 2000 --rounds 30
+
+REST: calls fastapi/rest.py's GET /hello straight through the ASGI interface
+(no client, no sockets) with and without InstrumentationMiddleware in the
+stack.
+
+GraphQL: executes a customers -> orders query against
+fastapi/5-graphql-dataloader.py's schema (seeded with --customers rows) with
+and without the graphql_metrics extension. This is the field-heavy case: most
+fields are plain attributes, which the extension must not slow down.
+
+Both interleave the two variants so scheduler noise and CPU frequency drift
+don't swamp a few microseconds: each reports the best round of each variant
+and the median of paired back-to-back timings (REST pairs rounds, GraphQL
+pairs single queries).
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(__file__))
+from harness import load_app  # noqa: E402
+from perf.instrumentation import InstrumentationMiddleware  # noqa: E402
+
+GRAPHQL_QUERY = "{ customers { id name email orders { id total } } }"
+
+
+async def call(app, path: str) -> None:
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1",
+        "method": "GET", "scheme": "http", "path": path, "raw_path": path.encode(),
+        "query_string": b"", "root_path": "", "headers": [(b"host", b"bench")],
+        "client": ("127.0.0.1", 1), "server": ("bench", 80),
+    }
+
+    async def receive() -> dict:
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message: dict) -> None:
+        pass
+
+    await app(scope, receive, send)
+
+
+async def run(app, n: int, path: str) -> float:
+    t0 = time.perf_counter()
+    for _ in range(n):
+        await call(app, path)
+    return time.perf_counter() - t0
+
+
+def without_instrumentation(module):
+    # same app object, middleware list minus ours
+    app = module.app
+    stack = [m for m in app.user_middleware if m.cls is not InstrumentationMiddleware]
+    saved = app.user_middleware
+    app.user_middleware = stack
+    plain = app.build_middleware_stack()
+    app.user_middleware = saved
+    return plain
+
+
+async def time_query(module, schema) -> float:
+    context = module.make_context()
+    t0 = time.perf_counter()
+    result = await schema.execute(GRAPHQL_QUERY, context_value=context)
+    elapsed = time.perf_counter() - t0
+    assert result.errors is None, result.errors
+    return elapsed
+
+
+def report(name: str, t_off: float, t_on: float, n: int, unit: str) -> None:
+    print(f"{name}")
+    print(f"  plain        : {t_off / n * 1e6:9.2f} us/{unit}")
+    print(f"  instrumented : {t_on / n * 1e6:9.2f} us/{unit}")
+    print(f"  overhead     : {(t_on - t_off) / t_off:9.2%}")
+
+
+async def graphql(args) -> None:
+    import strawberry
+
+    gql = load_app("fastapi/5-graphql-dataloader.py")
+    for cid in range(100, 100 + args.customers):
+        gql.CUSTOMERS[cid] = {"id": cid, "name": f"c{cid}", "email": f"c{cid}@x.com"}
+        gql.ORDERS[cid] = [{"id": cid * 10 + i, "total": float(i)} for i in range(3)]
+    instrumented = gql.schema
+    plain = strawberry.Schema(query=gql.Query, mutation=gql.Mutation)
+
+    await time_query(gql, instrumented)  # warm up; also wraps the resolvers
+    await time_query(gql, plain)
+    wrapped_calls = sum(int(line.rsplit(" ", 1)[1]) for line in gql.metrics.render().splitlines()
+                        if line.startswith("graphql_resolver_calls_total{"))
+
+    # one query is ~10s of ms, long enough to time alone; pairing adjacent runs
+    # (alternating which goes first) cancels drift that best-of-rounds can't
+    on, off, deltas = [], [], []
+    for i in range(args.rounds * args.queries):
+        first, second = (plain, instrumented) if i % 2 else (instrumented, plain)
+        t1, t2 = await time_query(gql, first), await time_query(gql, second)
+        t_off, t_on = (t1, t2) if first is plain else (t2, t1)
+        off.append(t_off)
+        on.append(t_on)
+        deltas.append(t_on - t_off)
+    report(f"GraphQL customers->orders ({len(gql.CUSTOMERS)} customers, {len(on)} query pairs, "
+           f"{wrapped_calls} wrapped resolver calls/query)", min(off), min(on), 1, "query")
+    print(f"  median paired overhead: {statistics.median(deltas) / statistics.median(off):9.2%}")
+
+
+async def main() -> None:
+    p = argparse.ArgumentParser()
+    p.add_argument("--requests", type=int, default=2_000)
+    p.add_argument("--rounds", type=int, default=30)
+    p.add_argument("--customers", type=int, default=300)
+    p.add_argument("--queries", type=int, default=5, help="GraphQL query pairs per round")
+    args = p.parse_args()
+
+    rest = load_app("fastapi/rest.py")
+    instrumented = rest.app.build_middleware_stack()
+    plain = without_instrumentation(rest)
+
+    await run(instrumented, 1000, "/hello")  # warm up
+    await run(plain, 1000, "/hello")
+    # same pairing as the GraphQL case: a round is ~10s of ms, so the best
+    # round alone still swings a few percent either way on a busy machine
+    on, off, deltas = [], [], []
+    for i in range(args.rounds):
+        first, second = (plain, instrumented) if i % 2 else (instrumented, plain)
+        t1, t2 = await run(first, args.requests, "/hello"), await run(second, args.requests, "/hello")
+        t_off, t_on = (t1, t2) if first is plain else (t2, t1)
+        off.append(t_off)
+        on.append(t_on)
+        deltas.append(t_on - t_off)
+
+    print(f"rounds={args.rounds}")
+    report(f"REST GET /hello ({args.requests:,} requests/round)", min(off), min(on), args.requests, "request")
+    delta = statistics.median(deltas)
+    print(f"  median paired overhead: {delta / statistics.median(off):9.2%}"
+          f" ({delta / args.requests * 1e6:.2f} us/request)")
+    await graphql(args)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,143 @@
+"""Burst load test for perf/singleflight.py.
+
+    python bench/bench_singleflight.py --burst 500 --rounds 5
+
+Fires `burst` identical requests at once (in-process, httpx + ASGITransport)
+against the real apps, first with coalescing bypassed (`x-no-coalesce`), then
+with it on, and reports how many handler executions actually ran.
+
+The apps run as shipped, admission control included. In 2-di single-flight
+sits outside AdmissionMiddleware, so only the burst's leader takes a
+concurrency slot; the x-no-coalesce pass goes through admission one by one
+and is sent in slot-sized waves. 5-graphql-dataloader coalesces inside the
+resolver, behind admission, so its burst is sent in waves too. Requests the
+rate limits still shed (429/503) are counted and reported, not run.
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+import httpx
+
+sys.path.insert(0, os.path.dirname(__file__))
+from harness import load_app  # noqa: E402
+from perf.admission import AdmissionMiddleware  # noqa: E402
+def middleware_flight(app):
+    # build the middleware stack and find our SingleFlightMiddleware in it
+    if app.middleware_stack is None:
+        app.middleware_stack = app.build_middleware_stack()
+    node = app.middleware_stack
+    while node is not None:
+        if hasattr(node, "flight"):
+            return node.flight
+        node = getattr(node, "app", None)
+    raise RuntimeError("SingleFlightMiddleware not mounted")
+
+
+def resolver_flight(schema, type_name: str, field_name: str):
+    field = next(f for f in schema.get_type_by_name(type_name).fields if f.name == field_name)
+    return field.base_resolver.wrapped_func.flight
+
+
+def admission_slots(app, path: str) -> int | None:
+    """Concurrency limit the app's AdmissionMiddleware applies to `path`, if any."""
+    for m in app.user_middleware:
+        if m.cls is AdmissionMiddleware:
+            limiter = AdmissionMiddleware(None, **m.kwargs)
+            route_class = limiter.classify(path)
+            slots = limiter.limiters.get(route_class) or limiter.limiters.get("default")
+            return slots.limit if slots else None
+    return None
+
+
+async def burst(client: httpx.AsyncClient, n: int, request: dict, wave: int | None = None) -> tuple[float, int]:
+    """Send n requests at once (or in waves of `wave`); returns (seconds, shed)."""
+    t0 = time.perf_counter()
+    responses = []
+    step = wave or n
+    for start in range(0, n, step):
+        responses += await asyncio.gather(*[client.request(**request) for _ in range(min(step, n - start))])
+    elapsed = time.perf_counter() - t0
+    shed = sum(r.status_code in (429, 503) for r in responses)
+    bad = [r.status_code for r in responses if r.status_code not in (200, 429, 503)]
+    assert not bad, bad[:5]
+    return elapsed, shed
+
+
+async def run_case(name: str, app, flight, request: dict, args, bypass: dict) -> None:
+    # bypassed requests each go through admission, so keep them within its slots
+    wave = admission_slots(app, request["url"])
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        plain = dict(request, headers={**request.get("headers", {}), **bypass})
+        t_off = 0.0
+        shed_off = 0
+        for _ in range(args.rounds):
+            t, shed = await burst(client, args.burst, plain, wave)
+            t_off += t
+            shed_off += shed
+        runs_off = args.rounds * args.burst - shed_off
+
+        before = flight.stats["executions"]
+        t_on = 0.0
+        shed_on = 0
+        for _ in range(args.rounds):
+            t, shed = await burst(client, args.burst, request)
+            t_on += t
+            shed_on += shed
+        runs_on = flight.stats["executions"] - before
+
+    total = args.rounds * args.burst
+    print(
+        f"{name:28s} requests={total:6d}  executions off={runs_off:6d} on={runs_on:5d}"
+        f"  saved={1 - runs_on / runs_off:6.1%}  time off={t_off:6.2f}s on={t_on:6.2f}s"
+        f"  shed off={shed_off} on={shed_on}  (off in waves of {wave or args.burst})"
+    )
+
+
+async def main() -> None:
+    p = argparse.ArgumentParser()
+    p.add_argument("--burst", type=int, default=500)
+    p.add_argument("--rounds", type=int, default=5)
+    args = p.parse_args()
+    bypass = {"x-no-coalesce": "1"}
+
+    di = load_app("fastapi/2-di.py")
+    di.repo.create(di.CustomerCreate(name="Alice", email="alice@x.com"))
+    await run_case(
+        "2-di GET /customers/1", di.app, middleware_flight(di.app),
+        {"method": "GET", "url": "/customers/1", "headers": {"x-api-key": "secret"}}, args, bypass,
+    )
+
+    cors = load_app("cors/fastapi-app.py")
+    await run_case(
+        "cors GET /employees", cors.app, middleware_flight(cors.app),
+        {"method": "GET", "url": "/employees"}, args, bypass,
+    )
+
+    # the resolver decorator has no header bypass; compare against calls instead.
+    # It sits behind admission, so only a slot's worth of requests overlap
+    gql = load_app("fastapi/5-graphql-dataloader.py")
+    flight = resolver_flight(gql.schema, "Query", "customer")
+    wave = admission_slots(gql.app, "/graphql")
+    transport = httpx.ASGITransport(app=gql.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        request = {"method": "POST", "url": "/graphql", "json": {"query": "{ customer(id: 1) { name } }"}}
+        t = 0.0
+        shed = 0
+        for _ in range(args.rounds):
+            elapsed, n_shed = await burst(client, args.burst, request, wave)
+            t += elapsed
+            shed += n_shed
+    s = flight.stats
+    print(
+        f"{'5-dataloader customer(id:)':28s} requests={s['calls']:6d}  executions off={s['calls']:6d}"
+        f" on={s['executions']:5d}  saved={s['shared'] / s['calls']:6.1%}  time on={t:6.2f}s"
+        f"  shed={shed}  (in waves of {wave})"
+    )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
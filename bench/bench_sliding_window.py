@@ -0,0 +1,128 @@
+"""Notebook sliding-window functions vs the streaming operators.
+
+    python bench/bench_sliding_window.py                 # 100M elements
+    python bench/bench_sliding_window.py --n 1000000 --chunk 65536
+
+The notebook versions need the whole input as a Python list, so at 100M they
+use several GB of RAM; pass --skip-notebook to only time the streaming side.
+"""
+import argparse
+import os
+import sys
+import time
+from collections import defaultdict
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from sliding_window_stream import (  # noqa: E402
+    AtMostKDistinct,
+    LongestUniqueRun,
+    ReplacementWindow,
+    longest_window,
+)
+
+
+# ---------- copied from 5-Sliding-window.ipynb ----------
+
+def totalFruit(fruits):
+    left = 0
+    fruit_map = defaultdict(int)
+    maxfruits = 0
+    for right, fruit in enumerate(fruits):
+        fruit_map[fruit] += 1
+        while len(fruit_map) > 2:
+            fruit_map[fruits[left]] -= 1
+            if fruit_map[fruits[left]] == 0: fruit_map.pop(fruits[left])
+            left += 1
+        maxfruits = max(maxfruits, right - left + 1)
+    return maxfruits
+
+
+def lengthOfLongestSubstring(s) -> int:
+    seen = set()
+    left = maxlen = 0
+    for right, value in enumerate(s):
+        while value in seen:
+            seen.remove(s[left])
+            left += 1
+        seen.add(value)
+        maxlen = max(maxlen, right - left + 1)
+    return maxlen
+
+
+def characterReplacement_op(s, k: int) -> int:
+    left = maxlen = 0
+    char_freq = defaultdict(int)
+    max_freq = 0
+    for right, alphabet in enumerate(s):
+        char_freq[alphabet] += 1
+        window_size = right - left + 1
+        max_freq = max(max_freq, char_freq[alphabet])
+        num_of_replacments_needed = window_size - max_freq
+        while num_of_replacments_needed > k:
+            char_freq[s[left]] -= 1
+            left += 1
+            window_size = right - left + 1
+            num_of_replacments_needed = window_size - max_freq
+        maxlen = max(maxlen, window_size)
+    return maxlen
+
+
+# ---------- inputs ----------
+
+def make_stream(n: int, alphabet: int, run: int, seed: int) -> np.ndarray:
+    # runs of repeated values, like the fruits example, so windows stay non-trivial
+    rng = np.random.default_rng(seed)
+    values = rng.integers(0, alphabet, size=n // run + 1, dtype=np.int64)
+    return np.repeat(values, rng.integers(1, 2 * run, size=values.size))[:n]
+
+
+def chunks_of(arr: np.ndarray, size: int):
+    for start in range(0, arr.size, size):
+        yield arr[start:start + size]
+
+
+def timed(fn):
+    t0 = time.perf_counter()
+    out = fn()
+    return out, time.perf_counter() - t0
+
+
+def main() -> None:
+    p = argparse.ArgumentParser()
+    p.add_argument("--n", type=int, default=100_000_000)
+    p.add_argument("--chunk", type=int, default=1 << 20)
+    p.add_argument("--alphabet", type=int, default=26)
+    p.add_argument("--k", type=int, default=2)
+    p.add_argument("--seed", type=int, default=7)
+    p.add_argument("--skip-notebook", action="store_true")
+    args = p.parse_args()
+
+    runs = make_stream(args.n, args.alphabet, run=8, seed=args.seed)
+    # unique-run problem needs a bigger alphabet or every window is tiny
+    spread = np.random.default_rng(args.seed).integers(0, 4096, size=args.n, dtype=np.int64)
+    cases = [
+        ("at-most-k-distinct", runs, totalFruit if args.k == 2 else None,
+         lambda: AtMostKDistinct(args.k)),
+        ("longest-unique-run", spread, lengthOfLongestSubstring,
+         LongestUniqueRun),
+        ("replacement-window", runs, lambda xs: characterReplacement_op(xs, args.k),
+         lambda: ReplacementWindow(args.k, alphabet=args.alphabet)),
+    ]
+
+    print(f"n={args.n:,} chunk={args.chunk:,} alphabet={args.alphabet} k={args.k}")
+    for name, data, notebook_fn, make_op in cases:
+        streamed, t_stream = timed(lambda: longest_window(make_op(), chunks_of(data, args.chunk)))
+        line = f"{name:20s} stream={t_stream:8.2f}s result={streamed}"
+        if not args.skip_notebook and notebook_fn is not None:
+            as_list = data.tolist()
+            expected, t_nb = timed(lambda: notebook_fn(as_list))
+            del as_list
+            assert expected == streamed, (name, expected, streamed)
+            line += f"  notebook={t_nb:8.2f}s  speedup={t_nb / t_stream:5.1f}x"
+        print(line)
+
+
+if __name__ == "__main__":
+    main()
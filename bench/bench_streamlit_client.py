@@ -0,0 +1,98 @@
+"""Page-render latency: bare requests.get (old streamlit-app.py) vs
+cors/backend_client.py.
+
+    python bench/bench_streamlit_client.py --renders 200
+
+Boots cors/fastapi-app.py on a loopback uvicorn server, then times what one
+Streamlit rerun does over the network:
+
+- employees page: GET /employees (the current app's only read)
+- a page reading several endpoints in a row. The backend only has one read,
+  so /employees with different query strings stands in for the others, plus
+  /openapi.json, which is big enough for gzip to matter. This shows what
+  connection reuse saves per extra call
+
+Runs outside `streamlit run`, so st.cache_* use their in-memory fallback,
+which behaves the same for a single process.
+"""
+import argparse
+import logging
+import os
+import statistics
+import sys
+import time
+
+import requests
+
+HERE = os.path.dirname(__file__)
+sys.path.insert(0, HERE)
+sys.path.insert(0, os.path.join(HERE, "..", "cors"))
+from harness import UvicornServer, load_app  # noqa: E402
+
+logging.getLogger("streamlit").setLevel(logging.ERROR)  # "no runtime" warnings
+import backend_client  # noqa: E402
+
+DASHBOARD = ["/employees", "/employees?page=2", "/employees?page=3", "/openapi.json"]
+
+
+def timed_renders(render, n: int) -> list[float]:
+    out = []
+    for _ in range(n):
+        t0 = time.perf_counter()
+        render()
+        out.append((time.perf_counter() - t0) * 1000)
+    return out
+
+
+def report(name: str, samples: list[float]) -> None:
+    samples = sorted(samples)
+    p95 = samples[int(0.95 * (len(samples) - 1))]
+    print(f"{name:34s} mean={statistics.mean(samples):7.2f}ms  p50={statistics.median(samples):7.2f}ms  "
+          f"p95={p95:7.2f}ms")
+
+
+def main() -> None:
+    p = argparse.ArgumentParser()
+    p.add_argument("--renders", type=int, default=200)
+    args = p.parse_args()
+
+    cors = load_app("cors/fastapi-app.py")
+    with UvicornServer(cors.app) as base:
+        backend_client.API_BASE = base
+
+        def old_employees():
+            requests.get(f"{base}/employees", timeout=10).json()
+
+        def old_dashboard():
+            for path in DASHBOARD:
+                requests.get(f"{base}{path}", timeout=10).json()
+
+        def pooled_employees():
+            backend_client.get_json("/employees")
+
+        def cached_employees():
+            backend_client.fetch_employees()
+
+        def pooled_dashboard():
+            for path in DASHBOARD:
+                backend_client.get_json(path)
+
+        for fn in (old_employees, pooled_employees, cached_employees, old_dashboard, pooled_dashboard):
+            fn()  # warm up (and fill the cache)
+
+        print(f"renders={args.renders} backend={base}")
+        report("employees: requests.get (current)", timed_renders(old_employees, args.renders))
+        report("employees: pooled session", timed_renders(pooled_employees, args.renders))
+        report("employees: pooled + cache_data", timed_renders(cached_employees, args.renders))
+        report("4 endpoints: requests.get", timed_renders(old_dashboard, args.renders))
+        report("4 endpoints: pooled session", timed_renders(pooled_dashboard, args.renders))
+
+        plain = requests.get(f"{base}/openapi.json", headers={"Accept-Encoding": "identity"}, timeout=10)
+        gz = backend_client.get_session().get(f"{base}/openapi.json", timeout=10, stream=True)
+        wire = len(gz.raw.read(decode_content=False))
+        print(f"/openapi.json bytes on the wire: identity={len(plain.content)} "
+              f"gzip={wire} ({gz.headers.get('content-encoding')})")
+
+
+if __name__ == "__main__":
+    main()
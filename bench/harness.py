@@ -0,0 +1,404 @@
+"""Load-test harness for every app in the repo.
+
+    python bench/harness.py                          # all scenarios, in-process
+    python bench/harness.py -s crud-mix -s large-list --requests 5000
+    python bench/harness.py --transport uvicorn      # real sockets on 127.0.0.1
+    python bench/harness.py --update-baseline        # record bench/baseline.json
+    python bench/harness.py --threshold 0.15         # exit 1 on >15% regression
+    python bench/harness.py --require-baseline       # also exit 2 if there's no baseline (CI)
+
+Each app is loaded fresh from its file and driven by `--concurrency` workers
+until `--requests` requests have completed. Per-request latencies give
+p50/p95/p99; results go to `--out` as JSON and are compared to the baseline.
+Responses AdmissionMiddleware sheds (429/503) are counted as `shed`, not as
+errors: their number depends on timing, so a rise only fails the comparison
+past `--shed-tolerance`.
+Everything runs offline: the default transport is httpx's ASGITransport, and
+the uvicorn transport binds to loopback only.
+
+Apps that mount SingleFlightMiddleware (perf/singleflight.py) answer
+identical concurrent GETs from one handler run, so their throughput counts
+shared responses. Those scenarios are run twice: as-is, and again as
+"<name>:no-coalesce" with the `x-no-coalesce` header, which counts every
+handler run.
+
+Baselines depend on the machine, so none is committed: record one on the box
+that runs the comparison, and pass --require-baseline there so a missing
+baseline fails instead of passing silently.
+"""
+import argparse
+import asyncio
+import importlib.util
+import json
+import os
+import platform
+import random
+import sys
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable
+
+import httpx
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.append(ROOT)
+DEFAULT_BASELINE = os.path.join(os.path.dirname(__file__), "baseline.json")
+
+
+def load_app(relpath: str):
+    # app files have dashes in their names, so load them by path
+    name = os.path.splitext(os.path.basename(relpath))[0].replace("-", "_")
+    spec = importlib.util.spec_from_file_location(name, os.path.join(ROOT, relpath))
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module  # strawberry resolves annotations through sys.modules
+    spec.loader.exec_module(module)
+    return module
+
+
+# ----------------------------
+# Scenarios
+# ----------------------------
+Step = Callable[[httpx.AsyncClient, dict, random.Random], Awaitable[httpx.Response]]
+
+
+@dataclass
+class Scenario:
+    name: str
+    app: str  # path relative to the repo root
+    setup: Callable[[httpx.AsyncClient, Any], Awaitable[dict]]
+    step: Step
+
+
+async def no_setup(client: httpx.AsyncClient, module: Any) -> dict:
+    return {}
+
+
+def seed_repo(module: Any, n: int) -> list[int]:
+    # 1-crud and 2-di: fill the in-memory repo directly, it's not what we measure
+    return [module.repo.create(module.CustomerCreate(name=f"c{i}", email=f"c{i}@x.com")).id
+            for i in range(n)]
+
+
+async def crud_setup(client, module):
+    return {"ids": seed_repo(module, 100)}
+
+
+async def crud_step(client, ctx, rnd):
+    r = rnd.random()
+    if r < 0.6:
+        return await client.get(f"/customers/{rnd.choice(ctx['ids'])}")
+    if r < 0.7:
+        return await client.get("/customers")
+    if r < 0.85:
+        resp = await client.post("/customers", json={"name": "new", "email": "new@x.com"})
+        ctx.setdefault("mine", []).append(resp.json()["id"])
+        return resp
+    if r < 0.95:
+        return await client.put(f"/customers/{rnd.choice(ctx['ids'])}", json={"name": "renamed"})
+    mine = ctx.get("mine")
+    if not mine:
+        return await client.get(f"/customers/{rnd.choice(ctx['ids'])}")
+    return await client.delete(f"/customers/{mine.pop()}")
+
+
+async def large_list_setup(client, module):
+    seed_repo(module, 5000)
+    return {}
+
+
+async def large_list_step(client, ctx, rnd):
+    return await client.get("/customers")
+
+
+API_KEY = {"x-api-key": "secret"}
+
+
+async def di_setup(client, module):
+    return {"ids": seed_repo(module, 100)}
+
+
+async def di_step(client, ctx, rnd):
+    if rnd.random() < 0.9:
+        return await client.get(f"/customers/{rnd.choice(ctx['ids'])}", headers=API_KEY)
+    return await client.get("/customers", headers=API_KEY)
+
+
+N_PLUS_1_QUERY = {"query": "{ customers { id name orders { id total } } }"}
+
+
+async def graphql_setup(client, module):
+    # 200 customers x 3 orders: Customer.orders runs once per customer
+    for cid in range(10, 210):
+        module.CUSTOMERS[cid] = {"id": cid, "name": f"c{cid}", "email": f"c{cid}@x.com"}
+        module.ORDERS[cid] = [{"id": cid * 10 + k, "total": float(k)} for k in range(3)]
+    return {}
+
+
+async def graphql_step(client, ctx, rnd):
+    return await client.post("/graphql", json=N_PLUS_1_QUERY)
+
+
+LOGIN_INTERVAL = 0.5  # seconds between bcrypt logins, across all workers
+
+
+async def security_setup(client, module):
+    # shared by every worker (drive() copies ctx shallowly)
+    return {"token": await login(client), "next_login": [time.perf_counter() + LOGIN_INTERVAL]}
+
+
+async def login(client) -> str:
+    resp = await client.post("/token", data={"username": "alice", "password": "alicepw"})
+    resp.raise_for_status()
+    return resp.json()["access_token"]
+
+
+async def security_step(client, ctx, rnd):
+    # logins are paced in time, like token refreshes, not per read: a fixed
+    # share of fast reads would turn every worker into a queued bcrypt login
+    # and measure admission shedding instead of the mix
+    now = time.perf_counter()
+    if now >= ctx["next_login"][0]:
+        ctx["next_login"][0] = now + LOGIN_INTERVAL
+        resp = await client.post("/token", data={"username": "alice", "password": "alicepw"})
+        if resp.status_code == 200:
+            ctx["token"] = resp.json()["access_token"]
+        return resp
+    return await client.get("/me", headers={"Authorization": f"Bearer {ctx['token']}"})
+
+
+async def query_step(client, ctx, rnd):
+    r = rnd.random()
+    if r < 0.4:
+        return await client.get("/items/", params={"after": rnd.randrange(100_000), "limit": 10})
+    if r < 0.7:
+        return await client.get("/tags/", params=[("t", "red"), ("t", "blue"), ("t", "sale")])
+    if r < 0.9:
+        return await client.get(f"/users/{rnd.randrange(100)}", params={"name": "x"})
+    return await client.get("/search/", params={"q": "blu de"})
+
+
+async def employees_step(client, ctx, rnd):
+    return await client.get("/employees")
+
+
+SCENARIOS = [
+    Scenario("crud-mix", "fastapi/1-crud.py", crud_setup, crud_step),
+    Scenario("large-list", "fastapi/1-crud.py", large_list_setup, large_list_step),
+    Scenario("di-reads", "fastapi/2-di.py", di_setup, di_step),
+    Scenario("graphql-n-plus-1", "fastapi/4-graphql-app.py", graphql_setup, graphql_step),
+    Scenario("graphql-dataloader", "fastapi/5-graphql-dataloader.py", graphql_setup, graphql_step),
+    Scenario("token-login-reads", "fastapi/6-security.py", security_setup, security_step),
+    Scenario("query-params", "fastapi/7-query.py", no_setup, query_step),
+    Scenario("cors-employees", "cors/fastapi-app.py", no_setup, employees_step),
+]
+
+
+# ----------------------------
+# Transports
+# ----------------------------
+class UvicornServer:
+    """Runs an app on 127.0.0.1 (ephemeral port) in a background thread."""
+
+    def __init__(self, app: Any) -> None:
+        import uvicorn
+
+        config = uvicorn.Config(app, host="127.0.0.1", port=0, log_level="warning", lifespan="off")
+        self.server = uvicorn.Server(config)
+        self.thread = threading.Thread(target=self.server.run, daemon=True)
+
+    def __enter__(self) -> str:
+        self.thread.start()
+        while not self.server.started:
+            time.sleep(0.01)
+        port = self.server.servers[0].sockets[0].getsockname()[1]
+        return f"http://127.0.0.1:{port}"
+
+    def __exit__(self, *exc: Any) -> None:
+        self.server.should_exit = True
+        self.thread.join()
+
+
+# ----------------------------
+# Driver
+# ----------------------------
+# refused by AdmissionMiddleware (perf/admission.py); how many depends on
+# timing, so they're counted apart from errors
+SHED_STATUSES = (429, 503)
+
+
+def percentile(sorted_values: list[float], q: float) -> float:
+    # nearest-rank
+    if not sorted_values:
+        return 0.0
+    idx = max(0, min(len(sorted_values) - 1, int(round(q * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[idx]
+
+
+async def drive(client: httpx.AsyncClient, scenario: Scenario, ctx: dict, requests: int,
+                concurrency: int, seed: int) -> tuple[list[float], int, float]:
+    latencies: list[float] = []
+    errors = shed = 0
+    remaining = requests
+
+    async def worker(wid: int) -> None:
+        nonlocal remaining, errors, shed
+        rnd = random.Random(seed * 1000 + wid)
+        wctx = dict(ctx)  # per-worker state (e.g. ids it created)
+        while remaining > 0:
+            remaining -= 1
+            start = time.perf_counter()
+            resp = await scenario.step(client, wctx, rnd)
+            latencies.append(time.perf_counter() - start)
+            if resp.status_code in SHED_STATUSES:
+                shed += 1
+            elif resp.status_code >= 400:
+                errors += 1
+
+    t0 = time.perf_counter()
+    await asyncio.gather(*[worker(w) for w in range(concurrency)])
+    return latencies, errors, shed, time.perf_counter() - t0
+
+
+def coalesces(app: Any) -> bool:
+    from perf.singleflight import SingleFlightMiddleware
+
+    return any(m.cls is SingleFlightMiddleware for m in app.user_middleware)
+
+
+async def run_scenario(scenario: Scenario, args: argparse.Namespace, no_coalesce: bool = False) -> dict:
+    module = load_app(scenario.app)
+    headers = {"x-no-coalesce": "1"} if no_coalesce else {}
+    if args.transport == "uvicorn":
+        with UvicornServer(module.app) as base_url:
+            async with httpx.AsyncClient(base_url=base_url, headers=headers) as client:
+                result = await measure(client, module, scenario, args)
+    else:
+        transport = httpx.ASGITransport(app=module.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", headers=headers) as client:
+            result = await measure(client, module, scenario, args)
+    result["coalesced"] = coalesces(module.app) and not no_coalesce
+    return result
+
+
+async def measure(client: httpx.AsyncClient, module: Any, scenario: Scenario,
+                  args: argparse.Namespace) -> dict:
+    ctx = await scenario.setup(client, module)
+    await drive(client, scenario, ctx, args.warmup, args.concurrency, args.seed)
+    latencies, errors, shed, elapsed = await drive(client, scenario, ctx, args.requests,
+                                             args.concurrency, args.seed + 1)
+    latencies.sort()
+    return {
+        "app": scenario.app,
+        "requests": len(latencies),
+        "errors": errors,
+        "shed": shed,
+        "throughput_rps": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 3),
+        "p95_ms": round(percentile(latencies, 0.95) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 3),
+    }
+
+
+def compare(results: dict, baseline: dict, threshold: float, shed_tolerance: float = 0.01) -> list[str]:
+    """Regressions past `threshold` (0.15 = 15%) against the baseline.
+
+    Any new error counts. Shed requests (429/503) count once their share of
+    requests rises by more than `shed_tolerance` (0.01 = 1 point).
+    """
+    regressions = []
+    for name, cur in results.items():
+        base = baseline.get(name)
+        if base is None:
+            continue
+        if cur["throughput_rps"] < base["throughput_rps"] * (1 - threshold):
+            regressions.append(f"{name}: throughput {base['throughput_rps']} -> {cur['throughput_rps']} rps")
+        for key in ("p50_ms", "p95_ms", "p99_ms"):
+            if cur[key] > base[key] * (1 + threshold):
+                regressions.append(f"{name}: {key} {base[key]} -> {cur[key]}")
+        if cur["errors"] > base.get("errors", 0):
+            regressions.append(f"{name}: errors {base.get('errors', 0)} -> {cur['errors']}")
+        base_shed = base.get("shed", 0) / max(base["requests"], 1)
+        if cur["shed"] / max(cur["requests"], 1) > base_shed + shed_tolerance:
+            regressions.append(f"{name}: shed {base.get('shed', 0)} -> {cur['shed']}")
+    return regressions
+
+
+async def main() -> int:
+    p = argparse.ArgumentParser()
+    p.add_argument("-s", "--scenario", action="append", choices=[s.name for s in SCENARIOS],
+                   help="run only these (repeatable)")
+    p.add_argument("--requests", type=int, default=2000)
+    p.add_argument("--concurrency", type=int, default=16)
+    p.add_argument("--warmup", type=int, default=100)
+    p.add_argument("--seed", type=int, default=1)
+    p.add_argument("--transport", choices=["asgi", "uvicorn"], default="asgi")
+    p.add_argument("--out", default="bench_results.json")
+    p.add_argument("--baseline", default=DEFAULT_BASELINE)
+    p.add_argument("--update-baseline", action="store_true")
+    p.add_argument("--threshold", type=float, default=0.15)
+    p.add_argument("--shed-tolerance", type=float, default=0.01,
+                   help="allowed rise in the share of 429/503 responses")
+    p.add_argument("--require-baseline", action="store_true",
+                   help="exit 2 if the baseline file or a scenario's entry is missing")
+    args = p.parse_args()
+
+    selected = [s for s in SCENARIOS if not args.scenario or s.name in args.scenario]
+    results = {}
+    print(f"{'scenario':34s} {'rps':>9s} {'p50 ms':>9s} {'p95 ms':>9s} {'p99 ms':>9s} {'errors':>6s} {'shed':>6s}")
+
+    def show(name: str, r: dict) -> None:
+        mark = " *" if r["coalesced"] else ""
+        print(f"{name + mark:34s} {r['throughput_rps']:9.1f} {r['p50_ms']:9.3f} "
+              f"{r['p95_ms']:9.3f} {r['p99_ms']:9.3f} {r['errors']:6d} {r['shed']:6d}")
+
+    for scenario in selected:
+        r = results[scenario.name] = await run_scenario(scenario, args)
+        show(scenario.name, r)
+        if r["coalesced"]:
+            name = f"{scenario.name}:no-coalesce"
+            show(name, results.setdefault(name, await run_scenario(scenario, args, no_coalesce=True)))
+    if any(r["coalesced"] for r in results.values()):
+        print("* single-flight on: concurrent identical GETs share one handler run, so rps counts\n"
+              "  shared responses; the :no-coalesce row sends x-no-coalesce and counts every run")
+
+    report = {
+        "meta": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "transport": args.transport,
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "seed": args.seed,
+        },
+        "scenarios": results,
+    }
+    with open(args.out, "w") as f:
+        json.dump(report, f, indent=2)
+
+    if args.update_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"baseline written to {args.baseline}")
+        return 0
+    if not os.path.exists(args.baseline):
+        print(f"no baseline at {args.baseline}; run with --update-baseline to record one")
+        return 2 if args.require_baseline else 0
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    for key in ("transport", "requests", "concurrency"):
+        if baseline["meta"].get(key) != report["meta"][key]:
+            print(f"warning: baseline {key}={baseline['meta'].get(key)!r}, this run {report['meta'][key]!r}")
+    missing = [name for name in results if name not in baseline["scenarios"]]
+    for name in missing:
+        print(f"no baseline entry for {name}")
+    regressions = compare(results, baseline["scenarios"], args.threshold, args.shed_tolerance)
+    for line in regressions:
+        print("REGRESSION", line)
+    if regressions:
+        return 1
+    return 2 if missing and args.require_baseline else 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
@@ -0,0 +1,59 @@
+"""Shared FastAPI backend client for the Streamlit pages.
+
+Streamlit re-runs the whole script on every widget interaction, so bare
+`requests.get` calls open a new TCP connection each time and repeat work the
+last run already did. This module keeps:
+
+- one pooled `requests.Session` per server process (`st.cache_resource`),
+  so connections are reused across reruns and users
+- `/employees` in `st.cache_data` for `EMPLOYEES_TTL` seconds
+
+gzip: requests advertises `Accept-Encoding: gzip` and decodes transparently;
+the backend compresses larger responses with GZipMiddleware.
+"""
+from typing import Any
+
+import requests
+import streamlit as st
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+API_BASE = "http://localhost:8000"
+TIMEOUT = 10
+EMPLOYEES_TTL = 30  # seconds
+
+
+@st.cache_resource
+def get_session() -> requests.Session:
+    session = requests.Session()
+    adapter = HTTPAdapter(
+        pool_connections=4,
+        pool_maxsize=16,  # one connection per concurrent rerun thread
+        max_retries=Retry(total=2, backoff_factor=0.1, allowed_methods=["GET"]),
+    )
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    session.headers["Accept-Encoding"] = "gzip"
+    return session
+
+
+def get(path: str) -> requests.Response:
+    r = get_session().get(f"{API_BASE}{path}", timeout=TIMEOUT)
+    r.raise_for_status()
+    return r
+
+
+def get_json(path: str) -> Any:
+    return get(path).json()
+
+
+@st.cache_data(ttl=EMPLOYEES_TTL, show_spinner=False)
+def fetch_employees() -> tuple[int, list[dict]]:
+    """(status code, employees); raises on non-2xx, so errors are never cached."""
+    r = get("/employees")
+    return r.status_code, r.json()
+
+
+def post_echo(payload: dict) -> requests.Response:
+    # writes are never cached
+    return get_session().post(f"{API_BASE}/echo", json=payload, timeout=TIMEOUT)
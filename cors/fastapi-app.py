@@ -1,8 +1,23 @@
+import sys
+from pathlib import Path
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))  # repo root, for perf/
+from perf.instrumentation import instrument
+from perf.singleflight import SingleFlightMiddleware
 
 app = FastAPI()
 
+# compress larger responses for clients sending Accept-Encoding: gzip
+app.add_middleware(GZipMiddleware, minimum_size=1000)
+
+# identical concurrent GET /employees share one handler run
+app.add_middleware(SingleFlightMiddleware)
+instrument(app)  # latency histograms + GET /metrics
+
 # Streamlit runs on http://localhost:8501 by default
 ALLOWED_ORIGINS = [
     "http://localhost:8502", # change back to 8501 to get rids of CORS error
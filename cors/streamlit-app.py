@@ -1,14 +1,21 @@
 import streamlit as st
 import requests
 
-API_BASE = "http://localhost:8000"
+# pooled session + cached /employees, shared across reruns (see backend_client.py)
+from backend_client import EMPLOYEES_TTL, fetch_employees, post_echo
 
 st.title("CORS demo: Streamlit → FastAPI")
 
 if st.button("GET /employees"):
-    r = requests.get(f"{API_BASE}/employees", timeout=10)
-    st.write("Status:", r.status_code)
-    st.json(r.json())
+    try:
+        status, employees = fetch_employees()
+        st.write("Status:", status)
+        st.json(employees)
+        st.caption(f"cached for {EMPLOYEES_TTL}s")
+    except requests.RequestException as e:
+        if e.response is not None:
+            st.write("Status:", e.response.status_code)
+        st.error(f"GET /employees failed: {e}")
 
 st.divider()
 
@@ -17,7 +24,7 @@ salary = st.number_input("Salary", 60000, step=1000)
 
 if st.button("POST /echo"):
     payload = {"name": name, "salary": int(salary)}
-    r = requests.post(f"{API_BASE}/echo", json=payload, timeout=10)
+    r = post_echo(payload)
     st.write("Status:", r.status_code)
     st.json(r.json())
 # Important nuance:
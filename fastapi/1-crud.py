@@ -1,8 +1,17 @@
+import sys
+from pathlib import Path
 from typing import Dict, List, Optional
 from fastapi import FastAPI, HTTPException, status
 from pydantic import BaseModel, EmailStr, Field
 
+sys.path.append(str(Path(__file__).resolve().parent.parent))  # repo root, for perf/
+from perf.instrumentation import instrument
+from perf.singleflight import SingleFlightMiddleware
+
 app = FastAPI(title="Customer API")
+# identical concurrent GETs share one handler run; POST/PUT/DELETE bypass it
+app.add_middleware(SingleFlightMiddleware)
+instrument(app)  # latency histograms + GET /metrics
 
 # ---------- DTOs (Pydantic models) ----------
 
@@ -1,9 +1,32 @@
+import sys
+from pathlib import Path
 from typing import Dict
 from fastapi import FastAPI, Depends, APIRouter, Header, HTTPException
 from pydantic import BaseModel, EmailStr, Field
 
+sys.path.append(str(Path(__file__).resolve().parent.parent))  # repo root, for perf/
+from perf.admission import AdmissionMiddleware, RateLimit
+from perf.instrumentation import instrument
+from perf.singleflight import SingleFlightMiddleware
+
 app = FastAPI(title="DI + Router demo")
 
+API_KEYS = {"secret": "demo-client"}  # api key -> client name
+# per-API-key rate limit (peer IP for unknown keys) + bounded queue for
+# customers_router; /health is exempt
+app.add_middleware(
+    AdmissionMiddleware,
+    classes={"/customers": "customers"},
+    concurrency={"customers": 32},
+    rates={"customers": RateLimit(rate=1000, burst=2000)},
+    api_key=API_KEYS.get,
+    key_sources={"customers": ("api_key", "ip")},
+)
+# identical concurrent GETs share one handler run (keyed on x-api-key too).
+# Added after admission so it runs first: waiters never take a slot or a token
+app.add_middleware(SingleFlightMiddleware)
+instrument(app)  # latency histograms + GET /metrics
+
 #DTOs
 class CustomerCreate(BaseModel):
     name: str
@@ -39,7 +62,7 @@ def get_repo()-> Repo:
 
 def require_api_key(x_api_key: str | None = Header(default=None)) -> None:
     # Very simple auth dependency (like a filter)
-    if x_api_key != "secret":
+    if x_api_key not in API_KEYS:
         raise HTTPException(status_code=401, detail="Invalid or missing API key")
 
 # ----------------------------
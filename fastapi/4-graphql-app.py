@@ -1,7 +1,15 @@
+import sys
+from pathlib import Path
+
 from fastapi import FastAPI
 from strawberry.fastapi import GraphQLRouter
 import strawberry
 
+sys.path.append(str(Path(__file__).resolve().parent.parent))  # repo root, for perf/
+from perf.admission import AdmissionMiddleware, RateLimit
+from perf.instrumentation import Metrics, graphql_metrics, instrument
+from perf.singleflight import coalesce
+
 # ----------------------------
 # In-memory "customer table"
 # ----------------------------
@@ -59,12 +67,18 @@ class CustomerUpdateInput:
     email: str | None = None
 
 
+@strawberry.input
+class OrderCreateInput:  # ADDED: used by create_order but was never defined
+    total: float
+
+
 # ----------------------------
 # Query Root
 # ----------------------------
 @strawberry.type
 class Query:
     @strawberry.field
+    @coalesce()  # concurrent customer(id: X) calls share one lookup
     def customer(self, id: int) -> Customer | None:
         # RESOLVER: Query.customer
         row = CUSTOMERS.get(id)
@@ -137,10 +151,20 @@ class Mutation:
 # ----------------------------
 # Schema + App
 # ----------------------------
-schema = strawberry.Schema(query=Query, mutation=Mutation)
+metrics = Metrics()
+schema = strawberry.Schema(query=Query, mutation=Mutation, extensions=[graphql_metrics(metrics)])
 
 app = FastAPI()
 app.include_router(GraphQLRouter(schema), prefix="/graphql")
+# per-IP rate limit + bounded queue for /graphql (no auth here, so no header is trusted)
+app.add_middleware(
+    AdmissionMiddleware,
+    classes={"/graphql": "graphql"},
+    concurrency={"graphql": 16},
+    rates={"graphql": RateLimit(rate=200, burst=400)},
+    key_sources={"graphql": ("ip",)},
+)
+instrument(app, metrics)  # route + resolver histograms, GET /metrics
 
 #--------------------------------
 # Query
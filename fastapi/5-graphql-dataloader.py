@@ -4,6 +4,13 @@ import strawberry
 from strawberry.types import Info
 from strawberry.dataloader import DataLoader
 import asyncio
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))  # repo root, for perf/
+from perf.admission import AdmissionMiddleware, RateLimit
+from perf.instrumentation import Metrics, graphql_metrics, instrument, instrument_loader
+from perf.singleflight import coalesce
 
 # ----------------------------
 # In-memory data (simulating DB tables)
@@ -53,10 +60,15 @@ async def batch_load_orders(customer_ids: list[int]) -> list[list[dict]]:
     return [rows_map.get(cid, []) for cid in customer_ids]
 
 
+metrics = Metrics()
+# same batch fn, but records keys-per-batch in dataloader_batch_size
+load_orders = instrument_loader(batch_load_orders, metrics, "orders")
+
+
 def make_context() -> dict:
     # Per-request context (fresh DataLoader per request is typical)
     return {
-        "orders_loader": DataLoader(load_fn=batch_load_orders),
+        "orders_loader": DataLoader(load_fn=load_orders),
         "db_calls": DB_CALLS,  # just to observe counts
     }
 
@@ -116,6 +128,7 @@ class Query:
         return [Customer(**r) for r in rows]
 
     @strawberry.field
+    @coalesce()  # concurrent customer(id: X) calls share one lookup
     def customer(self, id: int) -> Customer | None:
         row = CUSTOMERS.get(id)
         return Customer(**row) if row else None
@@ -155,9 +168,18 @@ class Mutation:
 # ----------------------------
 # FastAPI + GraphiQL
 # ----------------------------
-schema = strawberry.Schema(query=Query, mutation=Mutation)
+schema = strawberry.Schema(query=Query, mutation=Mutation, extensions=[graphql_metrics(metrics)])
 
 app = FastAPI(title="Customers GraphQL (N+1 + DataLoader)")
 
 # NOTE: context_getter is how resolvers access DataLoader via info.context
 app.include_router(GraphQLRouter(schema, context_getter=make_context), prefix="/graphql")
+# per-IP rate limit + bounded queue for /graphql (no auth here, so no header is trusted)
+app.add_middleware(
+    AdmissionMiddleware,
+    classes={"/graphql": "graphql"},
+    concurrency={"graphql": 16},
+    rates={"graphql": RateLimit(rate=200, burst=400)},
+    key_sources={"graphql": ("ip",)},
+)
+instrument(app, metrics)  # route + resolver histograms, batch sizes, GET /metrics
@@ -1,4 +1,6 @@
+import sys
 from datetime import datetime, timedelta, timezone
+from pathlib import Path
 from typing import Annotated
 
 from fastapi import Depends, FastAPI, HTTPException, Security, status
@@ -7,6 +9,10 @@ from jose import jwt, JWTError
 from passlib.context import CryptContext
 from pydantic import BaseModel
 
+sys.path.append(str(Path(__file__).resolve().parent.parent))  # repo root, for perf/
+from perf.admission import AdmissionMiddleware, RateLimit
+from perf.instrumentation import instrument
+
 app = FastAPI(title="FastAPI OAuth2 + JWT demo")
 
 # --- Security configuration ---
@@ -22,6 +28,28 @@ oauth2_scheme = OAuth2PasswordBearer(
     scopes={"admin": "Admin access", "read": "Read access"},
 )
 
+# --- Admission control ---
+def verified_sub(token: str) -> str | None:
+    # rate-limit key for bearer requests; verified so nobody can spend another user's budget
+    try:
+        return jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM]).get("sub")
+    except JWTError:
+        return None
+
+# /token runs bcrypt (~100ms CPU), so it gets few slots and a tight per-IP rate
+app.add_middleware(
+    AdmissionMiddleware,
+    classes={"/token": "auth"},
+    concurrency={"auth": 4, "default": 64},
+    rates={"auth": RateLimit(rate=10, burst=20), "default": RateLimit(rate=1000, burst=2000)},
+    jwt_sub=verified_sub,
+    key_sources={"auth": ("ip",)},  # nothing sent to /token is trusted yet
+    # a queued login waits for whole bcrypt calls; the 50ms/250ms defaults
+    # would shed it behind a single one
+    waits={"auth": (1.0, 5.0)},
+)
+instrument(app)  # latency histograms + GET /metrics
+
 # --- DTOs ---
 class Token(BaseModel):
     access_token: str
@@ -1,14 +1,30 @@
+import os
+import sys
+from pathlib import Path
 from typing import Union
 from fastapi import FastAPI, Query
 
+sys.path.append(str(Path(__file__).resolve().parent.parent))  # repo root, for perf/
+sys.path.append(str(Path(__file__).resolve().parent))  # for catalog.py
+from catalog import generate
+from perf.instrumentation import instrument
+
 app = FastAPI()
+instrument(app)  # latency histograms + GET /metrics
+
+# Columnar catalog with tag bitmaps and a prefix index (see catalog.py).
+# CATALOG_ITEMS=10000000 uvicorn 7-query:app for the big one.
+CATALOG = generate(int(os.environ.get("CATALOG_ITEMS", 100_000)))
 
 # 1. Basic Query Parameters
-# When you visit: /items/?skip=0&limit=10
-# 'skip' and 'limit' are inferred as query params because they aren't in the path
+# When you visit: /items/?after=0&limit=10
+# 'after' and 'limit' are inferred as query params because they aren't in the path.
+# Keyset pagination: 'after' is the last item_id of the previous page
+# (next_after in the response), so deep pages cost the same as the first one.
 @app.get("/items/")
-async def read_items(skip: int = 0, limit: int = 10):
-    return {"skip": skip, "limit": limit}
+async def read_items(after: Union[int, None] = None, limit: int = Query(default=10, ge=1, le=100)):
+    items, next_after = CATALOG.page(None, after, limit)
+    return {"items": items, "next_after": next_after}
 
 # 2. Optional Parameters
 # Using 'Union' or 'None' makes the parameter optional.
@@ -25,12 +41,16 @@ async def search_items(
         default=None, 
         min_length=3, 
         max_length=50, 
-        pattern="^fixedquery$",
+        pattern=r"^[\w\s-]+$",
         title="Search Query",
-        description="Search for items by a specific keyword"
-    )
+        description="Prefix search on item names; every word must match"
+    ),
+    after: Union[int, None] = None,
+    limit: int = Query(default=10, ge=1, le=100),
 ):
-    results = {"items": [{"item_id": "Foo"}, {"item_id": "Bar"}]}
+    match = CATALOG.matching(q) if q else None
+    items, next_after = CATALOG.page(match, after, limit)
+    results = {"count": CATALOG.count(match), "items": items, "next_after": next_after}
     if q:
         results.update({"q": q})
     return results
@@ -43,10 +63,16 @@ async def required_param(token: str):
     return {"token": token}
 
 # 5. List/Multiple Values
-# URL: /tags/?t=red&t=blue
+# URL: /tags/?t=red&t=blue -> items tagged red AND blue (bitmap intersection)
 @app.get("/tags/")
-async def read_tags(t: list[str] = Query(default=[])):
-    return {"tags": t}
+async def read_tags(
+    t: list[str] = Query(default=[]),
+    after: Union[int, None] = None,
+    limit: int = Query(default=10, ge=1, le=100),
+):
+    match = CATALOG.with_tags(t)
+    items, next_after = CATALOG.page(match, after, limit)
+    return {"tags": t, "count": CATALOG.count(match), "items": items, "next_after": next_after}
 
 if __name__ == "__main__":
     import uvicorn
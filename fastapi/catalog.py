@@ -0,0 +1,323 @@
+"""Columnar in-memory item catalog used by 7-query.py.
+
+Layout (one NumPy array per column, no dict per item):
+
+    ids        int64, sorted          -> row order == id order
+    prices     float64
+    names      one bytes blob + int64 offsets (like Arrow strings)
+    item tags  CSR: tag codes (int32) + per-row offsets
+
+Indexes:
+
+    tag   -> Bitmap of rows                /tags/?t=red&t=blue is a bitmap AND
+    token -> Bitmap of rows, tokens sorted /search/?q=blu is a bisect over the
+                                           sorted tokens + OR of the postings
+
+Bitmap is a small roaring-style compressed bitmap: rows are split by their
+high 16 bits into chunks, and each chunk is either a sorted uint16 array
+(sparse) or a 65536-bit bitset (dense). intersect()/union() work on any number
+of bitmaps at once: sparse chunks are filtered, dense ones are combined with
+vectorized bitwise ops, so sparse tags stay small and popular tags stay fast.
+
+Pagination is keyset: `after=<last id seen>` becomes a searchsorted on ids
+(or a chunk skip inside a Bitmap), so page 10,000 costs the same as page 1,
+unlike skip/limit.
+"""
+import bisect
+import re
+from array import array
+from typing import Iterable
+
+import numpy as np
+
+ARRAY_MAX = 1024  # above this a chunk is a bitset (8 KiB): bigger, but ANDs are much cheaper
+_WORD = re.compile(r"\w+")
+
+
+# ----------------------------
+# Compressed bitmap
+# ----------------------------
+def _bool(bits: np.ndarray) -> np.ndarray:
+    return np.unpackbits(bits, bitorder="little").view(bool)
+
+
+def _pack(lo: np.ndarray) -> np.ndarray:
+    dense = np.zeros(1 << 16, dtype=bool)
+    dense[lo] = True
+    return np.packbits(dense, bitorder="little")
+
+
+def _contains(bits: np.ndarray, lo: np.ndarray) -> np.ndarray:
+    # bit test without unpacking the whole 8 KiB chunk
+    return (bits[lo >> 3] >> (lo & 7).astype(np.uint8)) & 1 == 1
+
+
+def _unpack(bits: np.ndarray) -> np.ndarray:
+    return np.flatnonzero(_bool(bits)).astype(np.uint16)
+
+
+def _is_bits(chunk: np.ndarray) -> bool:
+    return chunk.dtype == np.uint8
+
+
+def _card(chunk: np.ndarray) -> int:
+    return int(np.bitwise_count(chunk).sum()) if _is_bits(chunk) else chunk.size
+
+
+class Bitmap:
+    __slots__ = ("keys", "chunks")
+
+    def __init__(self, keys: list[int] | None = None, chunks: list[np.ndarray] | None = None) -> None:
+        self.keys = keys or []      # sorted high-16-bit keys
+        self.chunks = chunks or []  # aligned with keys
+
+    @classmethod
+    def from_rows(cls, rows: np.ndarray) -> "Bitmap":
+        """rows must be sorted and unique."""
+        rows = np.asarray(rows, dtype=np.int64)
+        if rows.size == 0:
+            return cls()
+        high = rows >> 16
+        starts = np.flatnonzero(np.concatenate(([True], high[1:] != high[:-1])))
+        ends = np.append(starts[1:], rows.size)
+        keys, chunks = [], []
+        for s, e in zip(starts.tolist(), ends.tolist()):
+            lo = (rows[s:e] & 0xFFFF).astype(np.uint16)
+            keys.append(int(high[s]))
+            chunks.append(lo if lo.size <= ARRAY_MAX else _pack(lo))
+        return cls(keys, chunks)
+
+    def __len__(self) -> int:
+        return sum(_card(c) for c in self.chunks)
+
+    @property
+    def nbytes(self) -> int:
+        return sum(c.nbytes for c in self.chunks)
+
+    def __and__(self, other: "Bitmap") -> "Bitmap":
+        return intersect([self, other])
+
+    def __or__(self, other: "Bitmap") -> "Bitmap":
+        return union([self, other])
+
+    def rows_from(self, start: int, limit: int) -> np.ndarray:
+        """First `limit` rows >= start, in order."""
+        out: list[np.ndarray] = []
+        need = limit
+        for idx in range(bisect.bisect_left(self.keys, start >> 16), len(self.keys)):
+            key, chunk = self.keys[idx], self.chunks[idx]
+            lo = _unpack(chunk) if _is_bits(chunk) else chunk
+            rows = (np.int64(key) << 16) + lo.astype(np.int64)
+            if key == start >> 16:
+                rows = rows[rows >= start]
+            out.append(rows[:need])
+            need -= out[-1].size
+            if need <= 0:
+                break
+        return np.concatenate(out) if out else np.empty(0, dtype=np.int64)
+
+
+def intersect(bitmaps: list[Bitmap]) -> Bitmap:
+    """AND of any number of bitmaps.
+
+    Keys where every input is a bitset are ANDed as one stacked array, which
+    is most of the work for popular tags. Results are left as bitsets (not
+    converted back to arrays): they are short-lived and pagination only
+    unpacks the chunks it reads.
+    """
+    if not bitmaps:
+        return Bitmap()
+    by_key = [dict(zip(bm.keys, bm.chunks)) for bm in bitmaps]
+    common = set(bitmaps[0].keys).intersection(*(bm.keys for bm in bitmaps[1:]))
+    dense_keys, out = [], {}
+    for key in sorted(common):
+        chunks = [d[key] for d in by_key]
+        arrays = sorted((c for c in chunks if not _is_bits(c)), key=len)
+        if not arrays:
+            dense_keys.append(key)
+            continue
+        lo = arrays[0]
+        for c in arrays[1:]:
+            lo = np.intersect1d(lo, c, assume_unique=True)
+        for c in chunks:
+            if _is_bits(c) and lo.size:
+                lo = lo[_contains(c, lo)]
+        if lo.size:
+            out[key] = lo
+    if dense_keys:
+        acc = np.stack([by_key[0][k] for k in dense_keys])
+        for d in by_key[1:]:
+            acc &= np.stack([d[k] for k in dense_keys])
+        nonempty = acc.any(axis=1)
+        for key, bits, keep in zip(dense_keys, acc, nonempty.tolist()):
+            if keep:
+                out[key] = bits
+    keys = sorted(out)
+    return Bitmap(keys, [out[k] for k in keys])
+
+
+def union(bitmaps: list[Bitmap]) -> Bitmap:
+    """OR of any number of bitmaps, one merge per key."""
+    grouped: dict[int, list[np.ndarray]] = {}
+    for bm in bitmaps:
+        for key, chunk in zip(bm.keys, bm.chunks):
+            grouped.setdefault(key, []).append(chunk)
+    keys = sorted(grouped)
+    chunks = []
+    for key in keys:
+        group = grouped[key]
+        if len(group) == 1:
+            chunks.append(group[0])
+            continue
+        arrays = [c for c in group if not _is_bits(c)]
+        bits = [c for c in group if _is_bits(c)]
+        if not bits and sum(a.size for a in arrays) <= ARRAY_MAX:
+            chunks.append(np.unique(np.concatenate(arrays)))
+            continue
+        merged = _pack(np.concatenate(arrays)) if arrays else np.zeros(1 << 13, dtype=np.uint8)
+        for b in bits:
+            merged |= b
+        chunks.append(merged)
+    return Bitmap(keys, chunks)
+
+
+# ----------------------------
+# Catalog
+# ----------------------------
+def tokenize(text: str) -> list[str]:
+    return _WORD.findall(text.lower())
+
+
+class Catalog:
+    def __init__(self, ids: np.ndarray, names: Iterable[str], prices: np.ndarray,
+                 item_tags: Iterable[list[str]]) -> None:
+        self.ids = np.asarray(ids, dtype=np.int64)
+        if self.ids.size > 1 and not (np.diff(self.ids) > 0).all():
+            raise ValueError("ids must be sorted and unique")
+        self.prices = np.asarray(prices, dtype=np.float64)
+        n = self.ids.size
+
+        # names -> blob + offsets; tokens -> (token id, row) pairs in the same pass
+        blob = bytearray()
+        name_off = array("q", [0])
+        vocab: dict[str, int] = {}
+        tok_ids, tok_rows = array("i"), array("q")
+        for row, name in enumerate(names):
+            blob += name.encode()
+            name_off.append(len(blob))
+            for tok in set(tokenize(name)):
+                tok_ids.append(vocab.setdefault(tok, len(vocab)))
+                tok_rows.append(row)
+        self._names = bytes(blob)
+        self._name_off = np.frombuffer(name_off, dtype=np.int64)
+
+        # item tags -> CSR
+        tag_vocab: dict[str, int] = {}
+        tag_codes, tag_off = array("i"), array("q", [0])
+        for tags in item_tags:
+            for tag in dict.fromkeys(tags):  # a repeated tag would count (and list) the item twice
+                tag_codes.append(tag_vocab.setdefault(tag, len(tag_vocab)))
+            tag_off.append(len(tag_codes))
+        self._tag_codes = np.frombuffer(tag_codes, dtype=np.int32)
+        self._tag_off = np.frombuffer(tag_off, dtype=np.int64)
+        self.tag_names = list(tag_vocab)
+        if not (self._name_off.size == self._tag_off.size == n + 1 == self.prices.size + 1):
+            raise ValueError("all columns must have one entry per id")
+
+        tag_rows = np.repeat(np.arange(n, dtype=np.int64), np.diff(self._tag_off))
+        self._tag_index = dict(zip(self.tag_names, _postings(self._tag_codes, tag_rows, len(tag_vocab))))
+
+        postings = _postings(np.frombuffer(tok_ids, dtype=np.int32),
+                             np.frombuffer(tok_rows, dtype=np.int64), len(vocab))
+        order = sorted(range(len(vocab)), key=list(vocab).__getitem__)
+        self._tokens = [list(vocab)[i] for i in order]
+        self._token_postings = [postings[i] for i in order]
+
+    def __len__(self) -> int:
+        return self.ids.size
+
+    @property
+    def index_nbytes(self) -> int:
+        return (sum(b.nbytes for b in self._tag_index.values())
+                + sum(b.nbytes for b in self._token_postings))
+
+    # ---------- filters (None means "every row") ----------
+    def with_tags(self, tags: list[str]) -> Bitmap | None:
+        if not tags:
+            return None
+        return intersect([self._tag_index.get(t, Bitmap()) for t in set(tags)])
+
+    def matching(self, q: str) -> Bitmap:
+        """Every query word must prefix-match some token of the name."""
+        per_word = []
+        for term in tokenize(q):
+            lo = bisect.bisect_left(self._tokens, term)
+            hi = bisect.bisect_left(self._tokens, term + "\uffff")
+            per_word.append(union(self._token_postings[lo:hi]))
+        return intersect(per_word)
+
+    # ---------- reads ----------
+    def count(self, match: Bitmap | None) -> int:
+        return len(self) if match is None else len(match)
+
+    def page(self, match: Bitmap | None, after: int | None, limit: int) -> tuple[list[dict], int | None]:
+        """Keyset page: items with id > after. Returns (items, next_after)."""
+        start = 0 if after is None else int(np.searchsorted(self.ids, after, side="right"))
+        if match is None:
+            rows = np.arange(start, min(start + limit, len(self)))
+        else:
+            rows = match.rows_from(start, limit)
+        items = [self.item(int(r)) for r in rows]
+        next_after = items[-1]["item_id"] if len(items) == limit else None
+        return items, next_after
+
+    def item(self, row: int) -> dict:
+        a, b = self._name_off[row], self._name_off[row + 1]
+        t0, t1 = self._tag_off[row], self._tag_off[row + 1]
+        return {
+            "item_id": int(self.ids[row]),
+            "name": self._names[a:b].decode(),
+            "price": float(self.prices[row]),
+            "tags": [self.tag_names[c] for c in self._tag_codes[t0:t1]],
+        }
+
+
+def _postings(codes: np.ndarray, rows: np.ndarray, n_codes: int) -> list[Bitmap]:
+    # group rows by code; a stable sort keeps each group's rows ascending
+    order = np.argsort(codes, kind="stable")
+    bounds = np.searchsorted(codes[order], np.arange(n_codes + 1))
+    sorted_rows = rows[order]
+    return [Bitmap.from_rows(sorted_rows[bounds[i]:bounds[i + 1]]) for i in range(n_codes)]
+
+
+# ----------------------------
+# Sample data
+# ----------------------------
+ADJECTIVES = ["classic", "compact", "deluxe", "eco", "ergonomic", "heavy", "light", "mini",
+              "modern", "portable", "premium", "pro", "rugged", "smart", "slim", "vintage"]
+NOUNS = ["backpack", "blender", "bottle", "camera", "chair", "desk", "drone", "headphones",
+         "jacket", "kettle", "keyboard", "lamp", "monitor", "mouse", "mug", "notebook",
+         "pen", "phone", "router", "speaker", "tent", "toaster", "watch", "wallet"]
+COLORS = ["black", "blue", "green", "grey", "orange", "pink", "purple", "red", "white", "yellow"]
+TAGS = COLORS + ["sale", "new", "bestseller", "eco", "outdoor", "office", "kitchen", "gaming",
+                 "travel", "kids", "premium", "refurbished", "gift", "clearance", "limited"]
+
+
+def generate(n: int, seed: int = 0) -> Catalog:
+    """Synthetic catalog; tag popularity is skewed so some tags are dense, some sparse."""
+    rng = np.random.default_rng(seed)
+    adj = rng.integers(0, len(ADJECTIVES), n)
+    noun = rng.integers(0, len(NOUNS), n)
+    color = rng.integers(0, len(COLORS), n)
+    weights = 1.0 / np.arange(1, len(TAGS) + 1)
+    weights /= weights.sum()
+    n_tags = rng.integers(1, 5, n)
+    extra = rng.choice(len(TAGS), size=(n, 4), p=weights)
+
+    names = (f"{ADJECTIVES[a]} {COLORS[c]} {NOUNS[b]}" for a, c, b in zip(adj.tolist(), color.tolist(), noun.tolist()))
+    item_tags = (
+        list(dict.fromkeys([COLORS[c]] + [TAGS[t] for t in row[:k]]))
+        for c, row, k in zip(color.tolist(), extra.tolist(), n_tags.tolist())
+    )
+    prices = np.round(rng.uniform(1, 500, n), 2)
+    return Catalog(np.arange(1, n + 1), names, prices, item_tags)
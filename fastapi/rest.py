@@ -1,6 +1,13 @@
+import sys
+from pathlib import Path
+
 from fastapi import FastAPI
 
+sys.path.append(str(Path(__file__).resolve().parent.parent))  # repo root, for perf/
+from perf.instrumentation import instrument
+
 app = FastAPI()
+instrument(app)  # latency histograms + GET /metrics
 
 @app.get("/hello")
 def hello():
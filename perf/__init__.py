@@ -0,0 +1,22 @@
+"""Shared performance helpers mounted into the apps in fastapi/ and cors/.
+
+The apps are run as scripts (`uvicorn 2-di:app`), so each one appends the repo
+root to sys.path before importing from here.
+"""
+from perf.admission import AdmissionMiddleware, RateLimit, RedisBucketStore, ShardedBucketStore
+from perf.instrumentation import Metrics, graphql_metrics, instrument, instrument_loader
+from perf.singleflight import SingleFlight, SingleFlightMiddleware, coalesce
+
+__all__ = [
+    "AdmissionMiddleware",
+    "Metrics",
+    "RateLimit",
+    "RedisBucketStore",
+    "ShardedBucketStore",
+    "SingleFlight",
+    "SingleFlightMiddleware",
+    "coalesce",
+    "graphql_metrics",
+    "instrument",
+    "instrument_loader",
+]
@@ -0,0 +1,291 @@
+"""Admission control: per-client rate limits, per-route-class concurrency
+limits and latency-based load shedding.
+
+    app.add_middleware(
+        AdmissionMiddleware,
+        classes={"/token": "auth", "/graphql": "graphql"},   # path prefix -> class
+        concurrency={"auth": 4, "graphql": 16, "default": 64},
+        rates={"auth": RateLimit(5, 10), "default": RateLimit(100, 200)},
+    )
+
+Order of checks for each request:
+
+1. Token bucket for (route class, client). Empty bucket -> 429 + Retry-After.
+   The client is a verified x-api-key, else a verified JWT `sub`, else the
+   peer IP (header sources count only when the app passes a verifier);
+   `key_sources` narrows that per route class (e.g. IP only for a login form).
+2. Concurrency slot for the route class. If every slot is busy the request
+   queues, unless the recent queue wait (EWMA) is already over `target_wait`.
+   In that case it gets a 503 straight away instead of joining a queue that
+   can't drain in time. A request that waits longer than `max_wait` also
+   gets a 503. `waits` overrides both per route class; a class whose
+   requests take longer than the defaults (a bcrypt login) needs targets
+   above its own service time, or one slow request in the queue sheds it.
+
+Without step 2 an overloaded app queues without limit and latency grows for
+everyone. With it, accepted requests wait at most `max_wait`, so p99 stays
+bounded past saturation and the excess is refused cheaply.
+
+Bucket state lives in a `ShardedBucketStore` (in-process, lock per shard).
+`RedisBucketStore` is a drop-in alternative for any Redis-compatible server
+(redis-py style `eval`, sync or async client).
+"""
+import asyncio
+import inspect
+import json
+import threading
+import time
+from collections import OrderedDict, deque
+from dataclasses import dataclass
+from typing import Any, Callable
+
+
+@dataclass(frozen=True)
+class RateLimit:
+    rate: float   # tokens added per second
+    burst: float  # bucket size
+
+
+# ----------------------------
+# Bucket stores
+# ----------------------------
+class ShardedBucketStore:
+    """Token buckets in N dicts, each with its own lock, so threads (sync
+    endpoints run in a threadpool) rarely contend on the same lock.
+
+    Each shard is an LRU capped at `max_keys_per_shard`: a full shard drops its
+    least recently used bucket in O(1), so a flood of new keys can't make
+    every `take()` scan the shard.
+    """
+
+    def __init__(self, shards: int = 16, max_keys_per_shard: int = 10_000) -> None:
+        self._shards = [(OrderedDict(), threading.Lock()) for _ in range(shards)]
+        self.max_keys_per_shard = max_keys_per_shard
+
+    def take(self, key: str, limit: RateLimit, now: float) -> float:
+        """Take one token; returns 0 if allowed, else seconds until one is available."""
+        buckets, lock = self._shards[hash(key) % len(self._shards)]
+        with lock:
+            tokens, ts = buckets.pop(key, (limit.burst, now))
+            tokens = min(limit.burst, tokens + (now - ts) * limit.rate)
+            wait = 0.0
+            if tokens >= 1:
+                tokens -= 1
+            else:
+                wait = (1 - tokens) / limit.rate
+            buckets[key] = (tokens, now)  # re-inserted at the MRU end
+            if len(buckets) > self.max_keys_per_shard:
+                buckets.popitem(last=False)
+            return wait
+
+
+# same algorithm as ShardedBucketStore.take, atomically on the server
+_TAKE_LUA = """
+local rate, burst, now = tonumber(ARGV[1]), tonumber(ARGV[2]), tonumber(ARGV[3])
+local state = redis.call('HMGET', KEYS[1], 't', 'ts')
+local tokens = tonumber(state[1]) or burst
+local ts = tonumber(state[2]) or now
+tokens = math.min(burst, tokens + (now - ts) * rate)
+local wait = 0
+if tokens >= 1 then tokens = tokens - 1 else wait = (1 - tokens) / rate end
+redis.call('HSET', KEYS[1], 't', string.format('%.17g', tokens), 'ts', string.format('%.17g', now))
+redis.call('PEXPIRE', KEYS[1], math.ceil(burst / rate * 2000))
+return string.format('%.17g', wait)
+"""
+
+
+class RedisBucketStore:
+    def __init__(self, client: Any, prefix: str = "ratelimit:") -> None:
+        self.client = client
+        self.prefix = prefix
+
+    def take(self, key: str, limit: RateLimit, now: float) -> Any:
+        result = self.client.eval(_TAKE_LUA, 1, self.prefix + key, limit.rate, limit.burst, now)
+        if inspect.isawaitable(result):
+            async def finish() -> float:
+                return float(await result)
+            return finish()
+        return float(result)
+
+
+# ----------------------------
+# Concurrency limiter + shedding
+# ----------------------------
+class ClassLimiter:
+    """Concurrency slots for one route class, FIFO queue, EWMA of queue wait."""
+
+    def __init__(self, limit: int, target_wait: float = 0.05, max_wait: float = 0.25,
+                 alpha: float = 0.1) -> None:
+        self.limit = limit
+        self.target_wait = target_wait
+        self.max_wait = max_wait
+        self.alpha = alpha
+        self.active = 0
+        self.wait_ewma = 0.0
+        self.shed = 0
+        self._waiters: deque[asyncio.Future] = deque()
+
+    def _observe(self, wait: float) -> None:
+        self.wait_ewma += self.alpha * (wait - self.wait_ewma)
+
+    async def acquire(self) -> bool:
+        if self.active < self.limit and not self._waiters:
+            self.active += 1
+            self._observe(0.0)
+            return True
+        if self.wait_ewma > self.target_wait:
+            # queue is already too slow: refuse now rather than after max_wait
+            self.shed += 1
+            return False
+
+        fut = asyncio.get_running_loop().create_future()
+        self._waiters.append(fut)
+        start = time.perf_counter()
+        try:
+            # release() hands its slot straight to us, so `active` is unchanged
+            await asyncio.wait_for(fut, self.max_wait)
+        except asyncio.TimeoutError:
+            self._observe(time.perf_counter() - start)
+            self.shed += 1
+            return False
+        except asyncio.CancelledError:
+            if fut.done() and not fut.cancelled():
+                self.release()  # the slot was handed to us; pass it on
+            raise
+        self._observe(time.perf_counter() - start)
+        return True
+
+    def release(self) -> None:
+        while self._waiters:
+            fut = self._waiters.popleft()
+            if not fut.done():  # skip waiters that timed out
+                fut.set_result(None)
+                return
+        self.active -= 1
+
+
+# ----------------------------
+# Client keys
+# ----------------------------
+KEY_SOURCES = ("api_key", "sub", "ip")
+
+
+def client_key(
+    scope: dict,
+    jwt_sub: Callable[[str], str | None] | None = None,
+    api_key: Callable[[str], str | None] | None = None,
+    sources: tuple[str, ...] = KEY_SOURCES,
+) -> str:
+    """First of `sources` that yields an identity: verified x-api-key,
+    verified JWT `sub`, peer IP.
+
+    Client-supplied headers only count once something vouches for them, or a
+    client could get a fresh bucket per request by sending a random value:
+    x-api-key is used only if `api_key` maps it to a known client, and the
+    bearer token only if `jwt_sub` verifies it and returns its sub (see
+    6-security.py). Without a verifier that source is skipped. Use
+    sources=("ip",) for endpoints like a login form, where no header can be
+    trusted yet.
+    """
+    headers = dict(scope["headers"])
+    for source in sources:
+        if source == "api_key" and api_key is not None:
+            raw = headers.get(b"x-api-key")
+            owner = api_key(raw.decode("latin-1")) if raw else None
+            if owner:
+                return "key:" + owner
+        elif source == "sub" and jwt_sub is not None:
+            auth = headers.get(b"authorization", b"")
+            if auth[:7].lower() == b"bearer ":
+                sub = jwt_sub(auth[7:].decode("latin-1"))
+                if sub:
+                    return "sub:" + sub
+        elif source == "ip":
+            client = scope.get("client")
+            return "ip:" + (client[0] if client else "unknown")
+    return "anonymous"
+
+
+# ----------------------------
+# Middleware
+# ----------------------------
+class AdmissionMiddleware:
+    def __init__(
+        self,
+        app: Any,
+        classes: dict[str, str] | None = None,
+        concurrency: dict[str, int] | None = None,
+        rates: dict[str, RateLimit] | None = None,
+        store: Any = None,
+        jwt_sub: Callable[[str], str | None] | None = None,
+        api_key: Callable[[str], str | None] | None = None,
+        key_sources: dict[str, tuple[str, ...]] | None = None,
+        target_wait: float = 0.05,
+        max_wait: float = 0.25,
+        waits: dict[str, tuple[float, float]] | None = None,
+        exempt: tuple[str, ...] = ("/metrics", "/health"),
+    ) -> None:
+        self.app = app
+        # longest prefix first so /graphql/x beats /graphql
+        self.classes = sorted((classes or {}).items(), key=lambda kv: -len(kv[0]))
+        waits = waits or {}
+        self.limiters = {
+            name: ClassLimiter(limit, *waits.get(name, (target_wait, max_wait)))
+            for name, limit in (concurrency or {}).items()
+        }
+        self.rates = rates or {}
+        self.store = store or ShardedBucketStore()
+        self.jwt_sub = jwt_sub
+        self.api_key = api_key
+        self.key_sources = key_sources or {}
+        self.exempt = exempt
+
+    def classify(self, path: str) -> str:
+        for prefix, name in self.classes:
+            if path.startswith(prefix):
+                return name
+        return "default"
+
+    async def __call__(self, scope: dict, receive: Callable, send: Callable) -> None:
+        if scope["type"] != "http" or scope["path"] in self.exempt:
+            await self.app(scope, receive, send)
+            return
+
+        route_class = self.classify(scope["path"])
+        limit = self.rates.get(route_class) or self.rates.get("default")
+        if limit is not None:
+            sources = self.key_sources.get(route_class, KEY_SOURCES)
+            key = f"{route_class}:{client_key(scope, self.jwt_sub, self.api_key, sources)}"
+            wait = self.store.take(key, limit, time.time())
+            if inspect.isawaitable(wait):
+                wait = await wait
+            if wait > 0:
+                await _reject(scope, send, 429, "Rate limit exceeded", wait)
+                return
+
+        limiter = self.limiters.get(route_class) or self.limiters.get("default")
+        if limiter is None:
+            await self.app(scope, receive, send)
+            return
+        if not await limiter.acquire():
+            await _reject(scope, send, 503, "Server overloaded, retry later", 1)
+            return
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            limiter.release()
+
+
+async def _reject(scope: dict, send: Callable, status: int, detail: str, retry_after: float) -> None:
+    scope["perf.rejected"] = status  # lets instrumentation label it apart from 404s
+    body = json.dumps({"detail": detail}).encode()
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(body)).encode()),
+            (b"retry-after", str(max(1, round(retry_after))).encode()),
+        ],
+    })
+    await send({"type": "http.response.body", "body": body})
@@ -0,0 +1,182 @@
+"""Request coalescing ("single-flight") for identical concurrent reads.
+
+When the same read arrives many times while the first copy is still running,
+only the first one (the leader) executes; the rest await its result.
+Nothing is cached: once the leader finishes the key is forgotten, so the next
+request runs the handler again.
+
+Two ways to use it:
+
+    # ASGI middleware: GET/HEAD share the captured response bytes
+    app.add_middleware(SingleFlightMiddleware)
+
+    # resolver decorator: concurrent calls with the same kwargs share the result
+    @strawberry.field
+    @coalesce()
+    def customer(self, id: int) -> Customer | None: ...
+
+Writes (any other method) bypass the middleware, as does a request carrying
+the `x-no-coalesce` header.
+"""
+import asyncio
+import functools
+import inspect
+from typing import Any, Awaitable, Callable, Hashable
+
+Message = dict[str, Any]
+
+# what routing (and admission) wrote into the leader's scope; waiters get a
+# copy so outer middleware sees the same route, e.g. for per-route metrics
+SHARED_SCOPE_KEYS = ("route", "endpoint", "path_params", "fastapi", "perf.rejected")
+
+
+class SingleFlight:
+    def __init__(self, timeout: float | None = 5.0) -> None:
+        # timeout applies to waiters only; the leader runs to completion
+        self.timeout = timeout
+        self._inflight: dict[Hashable, asyncio.Future] = {}
+        self.stats = {"calls": 0, "executions": 0, "shared": 0, "timeouts": 0}
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        self.stats["calls"] += 1
+        while (fut := self._inflight.get(key)) is not None:
+            try:
+                # shield: a waiter timing out must not cancel the leader's future
+                result = await asyncio.wait_for(asyncio.shield(fut), self.timeout)
+            except asyncio.TimeoutError:
+                self.stats["timeouts"] += 1
+                raise
+            except _LeaderCancelled:
+                # the leader's caller went away (e.g. client disconnect); the
+                # key is gone, so the first waiter through runs fn itself
+                continue
+            self.stats["shared"] += 1
+            return result
+
+        fut = asyncio.get_running_loop().create_future()
+        self._inflight[key] = fut
+        self.stats["executions"] += 1
+        try:
+            result = await fn()
+        except asyncio.CancelledError:
+            # not fut.cancel(): that would cancel every waiter along with us
+            fut.set_exception(_LeaderCancelled())
+            fut.exception()
+            raise
+        except BaseException as exc:
+            fut.set_exception(exc)
+            fut.exception()  # mark retrieved so a leader with no waiters doesn't log a warning
+            raise
+        else:
+            fut.set_result(result)
+            return result
+        finally:
+            if self._inflight.get(key) is fut:
+                del self._inflight[key]
+
+
+class _LeaderCancelled(Exception):
+    pass
+
+
+class SingleFlightMiddleware:
+    """Pure ASGI middleware; the key is method + path + query + `vary_headers`.
+
+    Credentials are part of the key by default, so two users never share a
+    response. Waiters that exceed `timeout` get a 504.
+    """
+
+    def __init__(
+        self,
+        app: Any,
+        flight: SingleFlight | None = None,
+        methods: tuple[str, ...] = ("GET", "HEAD"),
+        vary_headers: tuple[str, ...] = ("authorization", "x-api-key", "cookie", "accept-encoding"),
+        bypass_header: str = "x-no-coalesce",
+        timeout: float | None = 5.0,
+    ) -> None:
+        self.app = app
+        self.flight = flight or SingleFlight(timeout=timeout)
+        self.methods = set(methods)
+        self.vary_headers = tuple(h.encode("latin-1") for h in vary_headers)
+        self.bypass_header = bypass_header.encode("latin-1")
+
+    async def __call__(self, scope: dict, receive: Callable, send: Callable) -> None:
+        if scope["type"] != "http" or scope["method"] not in self.methods:
+            await self.app(scope, receive, send)
+            return
+        headers = dict(scope["headers"])
+        if self.bypass_header in headers:
+            await self.app(scope, receive, send)
+            return
+
+        key = (
+            scope["method"],
+            scope["path"],
+            scope["query_string"],
+            tuple(headers.get(h) for h in self.vary_headers),
+        )
+        try:
+            messages, routing = await self.flight.do(key, lambda: self._capture(scope, receive))
+        except asyncio.TimeoutError:
+            await _send_json(send, 504, b'{"detail":"Timed out waiting for an identical in-flight request"}')
+            return
+
+        for k, v in routing.items():
+            scope.setdefault(k, v)
+        for message in messages:
+            # copy: outer middleware (e.g. GZip) may edit headers in place
+            if message["type"] == "http.response.start":
+                message = {**message, "headers": list(message.get("headers", []))}
+            await send(message)
+
+    async def _capture(self, scope: dict, receive: Callable) -> tuple[list[Message], dict]:
+        messages: list[Message] = []
+
+        async def capture(message: Message) -> None:
+            messages.append(message)
+
+        await self.app(scope, receive, capture)
+        routing = {k: scope[k] for k in SHARED_SCOPE_KEYS if k in scope}
+        if "fastapi" in routing:
+            routing["fastapi"] = dict(routing["fastapi"])
+        return messages, routing
+
+
+async def _send_json(send: Callable, status: int, body: bytes) -> None:
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())],
+    })
+    await send({"type": "http.response.body", "body": body})
+
+
+def coalesce(flight: SingleFlight | None = None, key: Callable[..., Hashable] | None = None):
+    """Decorator for (sync or async) resolvers. Sync ones run in a worker thread.
+
+    The default key is the resolver name plus its keyword arguments, which is
+    how Strawberry passes GraphQL args. Positional args (the root `self`) are
+    ignored. Pass `key=` if an argument is unhashable or per-request (Info).
+    """
+    def decorator(fn: Callable) -> Callable:
+        fl = flight or SingleFlight()
+        is_async = inspect.iscoroutinefunction(fn)
+
+        @functools.wraps(fn)
+        async def wrapper(*args: Any, **kwargs: Any) -> Any:
+            k = (fn.__qualname__, key(*args, **kwargs) if key else tuple(sorted(kwargs.items())))
+
+            async def call() -> Any:
+                if is_async:
+                    return await fn(*args, **kwargs)
+                # like FastAPI's `def` endpoints: off the event loop, which also
+                # lets identical calls arrive while this one is running
+                return await asyncio.to_thread(fn, *args, **kwargs)
+
+            return await fl.do(k, call)
+
+        wrapper.flight = fl  # expose stats
+        return wrapper
+
+    return decorator
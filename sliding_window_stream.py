@@ -0,0 +1,222 @@
+"""Streaming versions of the sliding-window problems in 5-Sliding-window.ipynb.
+
+The notebook functions need the whole list/string in memory (they index back
+into `fruits[left]` / `s[left]`). The operators below only keep O(window)
+state, so they can be fed an event stream chunk by chunk:
+
+    op = AtMostKDistinct(k=2)          # totalFruit
+    for chunk in chunks:               # lists, generators or NumPy arrays
+        op.extend(chunk)
+    op.result
+
+State is carried across chunk boundaries, so splitting the input differently
+never changes the answer. NumPy is optional: when a chunk is an ndarray the
+operators switch to a vectorized path, otherwise they fall back to plain
+Python loops.
+"""
+from collections import deque, defaultdict
+from typing import Any, Hashable, Iterable
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is only needed for the vectorized paths
+    np = None
+
+
+def _is_array(chunk: Any) -> bool:
+    return np is not None and isinstance(chunk, np.ndarray)
+
+
+class AtMostKDistinct:
+    """Longest window with at most k distinct values (totalFruit when k=2).
+
+    Instead of walking `left` forward one element at a time we remember the
+    last index of each value in the window. Dict insertion order gives us the
+    value whose last occurrence is oldest, and evicting it moves `left` in
+    O(1). State is at most k+1 entries.
+    """
+
+    def __init__(self, k: int) -> None:
+        if k < 0:
+            raise ValueError("k must be >= 0")
+        self.k = k
+        self._last: dict[Hashable, int] = {}  # value -> last index, oldest first
+        self._left = 0
+        self._n = 0
+        self.result = 0
+
+    def push(self, value: Hashable) -> None:
+        self.push_run(value, 1)
+
+    def push_run(self, value: Hashable, count: int) -> None:
+        # a run of identical values only matters at its last index
+        i = self._n + count - 1
+        self._n += count
+        self._last.pop(value, None)
+        self._last[value] = i
+        if len(self._last) > self.k:
+            oldest = next(iter(self._last))
+            self._left = self._last.pop(oldest) + 1
+        self.result = max(self.result, i - self._left + 1)
+
+    def extend(self, chunk: Iterable[Hashable]) -> None:
+        if _is_array(chunk):
+            # run-length encode the chunk so the Python loop runs once per run
+            if chunk.size == 0:
+                return
+            starts = np.flatnonzero(np.concatenate(([True], chunk[1:] != chunk[:-1])))
+            counts = np.diff(np.append(starts, chunk.size))
+            for value, count in zip(chunk[starts].tolist(), counts.tolist()):
+                self.push_run(value, count)
+            return
+        for value in chunk:
+            self.push(value)
+
+
+class LongestUniqueRun:
+    """Longest window without a repeated value (lengthOfLongestSubstring).
+
+    Keeps the last index of each value; `left` jumps past the previous
+    occurrence instead of removing elements one by one. Entries that fell out
+    of the window are pruned so state stays O(window).
+    """
+
+    def __init__(self) -> None:
+        self._last: dict[Hashable, int] = {}
+        self._left = 0
+        self._n = 0
+        self.result = 0
+
+    def push(self, value: Hashable) -> None:
+        i = self._n
+        self._n += 1
+        j = self._last.get(value)
+        if j is not None and j >= self._left:
+            self._left = j + 1
+        self._last[value] = i
+        self.result = max(self.result, i - self._left + 1)
+        self._maybe_prune()
+
+    def _maybe_prune(self) -> None:
+        if len(self._last) > 2 * (self._n - self._left) + 64:
+            self._last = {v: j for v, j in self._last.items() if j >= self._left}
+
+    def extend(self, chunk: Iterable[Hashable]) -> None:
+        if _is_array(chunk):
+            self._extend_array(chunk)
+            return
+        for value in chunk:
+            self.push(value)
+
+    def _extend_array(self, chunk: Any) -> None:
+        size = chunk.size
+        if size == 0:
+            return
+        base = self._n
+        # prev[i] = global index of the previous occurrence of chunk[i] (-1 if none)
+        order = np.argsort(chunk, kind="stable")
+        ordered = chunk[order]
+        same = ordered[1:] == ordered[:-1]
+        prev = np.empty(size, dtype=np.int64)
+        prev[order[1:][same]] = order[:-1][same] + base
+        firsts = np.flatnonzero(np.concatenate(([True], ~same)))
+        first_vals = ordered[firsts].tolist()
+        prev[order[firsts]] = [self._last.get(v, -1) for v in first_vals]
+
+        # left only moves right: it is a running max of (prev + 1)
+        lefts = np.maximum.accumulate(np.maximum(prev + 1, self._left))
+        lengths = np.arange(base, base + size) - lefts + 1
+        self.result = max(self.result, int(lengths.max()))
+        self._left = int(lefts[-1])
+        self._n += size
+
+        lasts = np.append(firsts[1:], size) - 1  # last slot of each value group
+        for v, pos in zip(first_vals, order[lasts].tolist()):
+            self._last[v] = pos + base
+        self._maybe_prune()
+
+
+class ReplacementWindow:
+    """Longest window that becomes one repeated value after at most k
+    replacements (characterReplacement_op).
+
+    Scalar path: same trick as the notebook - max_freq never decreases, so the
+    window never shrinks and we only need a deque of its contents.
+
+    Vectorized path (pass `alphabet` when values are ints in [0, alphabet)):
+    for each symbol c the best window is the widest span holding at most k
+    non-c values, i.e. the gap between a non-c position and the (k+1)-th one
+    after it. We only carry the last k+1 non-c positions per symbol across
+    chunks, so state is O(alphabet * k).
+    """
+
+    def __init__(self, k: int, alphabet: int | None = None) -> None:
+        if k < 0:
+            raise ValueError("k must be >= 0")
+        self.k = k
+        self.alphabet = alphabet
+        self._n = 0
+        self._best = 0
+        # scalar state
+        self._window: deque = deque()
+        self._freq: defaultdict = defaultdict(int)
+        self._max_freq = 0
+        # vectorized state: last k+1 non-c positions per symbol, -1 is the start sentinel
+        self._tails = None
+        if alphabet is not None:
+            if np is None:
+                raise RuntimeError("alphabet mode needs numpy")
+            self._tails = [np.array([-1], dtype=np.int64) for _ in range(alphabet)]
+
+    def push(self, value: Hashable) -> None:
+        if self._tails is not None:
+            self._extend_array(np.array([value]))
+            return
+        self._n += 1
+        self._window.append(value)
+        self._freq[value] += 1
+        self._max_freq = max(self._max_freq, self._freq[value])
+        if len(self._window) - self._max_freq > self.k:
+            old = self._window.popleft()
+            self._freq[old] -= 1
+            if self._freq[old] == 0:
+                del self._freq[old]
+        self._best = max(self._best, len(self._window))
+
+    def extend(self, chunk: Iterable[Hashable]) -> None:
+        if self._tails is not None:
+            self._extend_array(np.asarray(chunk))
+            return
+        for value in chunk:
+            self.push(value)
+
+    def _extend_array(self, chunk: Any) -> None:
+        if chunk.size == 0:
+            return
+        base, span = self._n, self.k + 1
+        for c in range(self.alphabet):
+            positions = np.concatenate((self._tails[c], np.flatnonzero(chunk != c) + base))
+            if positions.size > span:
+                gaps = positions[span:] - positions[:-span] - 1
+                self._best = max(self._best, int(gaps.max()))
+            self._tails[c] = positions[-span:]
+        self._n += chunk.size
+
+    @property
+    def result(self) -> int:
+        if self._tails is None:
+            return self._best
+        # close every symbol's last open window at the end of the stream
+        best = self._best
+        for tail in self._tails:
+            if tail.size < self.k + 1:
+                return self._n
+            best = max(best, self._n - int(tail[0]) - 1)
+        return best
+
+
+def longest_window(op: Any, chunks: Iterable[Iterable[Hashable]]) -> int:
+    """Feed every chunk into `op` and return its result."""
+    for chunk in chunks:
+        op.extend(chunk)
+    return op.result
@@ -0,0 +1,275 @@
+"""Incremental rollups for the per-year GenAI report in 1_windows-fn.md.
+
+The original query groups the whole `genai` table twice and ranks tools with
+ROW_NUMBER() on every run. Here AFTER INSERT triggers keep three small tables
+up to date instead:
+
+    genai_year_company  (year, company)    -> rows, training hours
+    genai_year_tool     (year, genai_tool) -> tool_adoptions
+    genai_year          (year)             -> num_companies, hours sum/count,
+                                              most_adopted_tool (+ its count)
+
+so the report is a scan of `genai_year`: O(years), not O(rows).
+
+Rows with a NULL year are left out of the rollups. Only inserts are
+maintained: the mode can't be fixed up cheaply on delete or update (the
+runner-up isn't tracked), so after those call `rebuild()`.
+
+    import sqlite3
+    conn = sqlite3.connect("genai.db")
+    rollup = GenAIRollup(conn)
+    rollup.install()            # tables + triggers, backfills existing rows
+    rollup.insert_many([(2023, "A", 10, "ChatGPT"), ...])
+    rollup.report()
+"""
+import sqlite3
+from typing import Iterable
+
+# ----------------------------
+# Original query (from 1_windows-fn.md), used for the consistency check
+# ----------------------------
+REPORT_SQL = """
+WITH yearly AS (
+  SELECT
+    year,
+    COUNT(DISTINCT company) AS num_companies,
+    AVG(training_hours)     AS avg_training_hours
+  FROM genai
+  GROUP BY year
+),
+tool_counts AS (
+  SELECT
+    year,
+    genai_tool,
+    COUNT(*) AS tool_adoptions
+  FROM genai
+  WHERE genai_tool IS NOT NULL
+  GROUP BY year, genai_tool
+),
+top_tool AS (
+  SELECT
+    year,
+    genai_tool AS most_adopted_tool
+  FROM (
+    SELECT
+      year,
+      genai_tool,
+      tool_adoptions,
+      ROW_NUMBER() OVER (
+        PARTITION BY year
+        ORDER BY tool_adoptions DESC, genai_tool ASC
+      ) AS rn
+    FROM tool_counts
+  ) t
+  WHERE rn = 1
+)
+SELECT
+  y.year,
+  y.num_companies,
+  y.avg_training_hours,
+  tt.most_adopted_tool
+FROM yearly y
+LEFT JOIN top_tool tt
+  ON y.year = tt.year
+ORDER BY y.year
+"""
+
+ROLLUP_REPORT_SQL = """
+SELECT
+  year,
+  num_companies,
+  CASE WHEN hours_rows = 0 THEN NULL ELSE hours_sum * 1.0 / hours_rows END AS avg_training_hours,
+  most_adopted_tool
+FROM genai_year
+ORDER BY year
+"""
+
+# ----------------------------
+# Schema
+# ----------------------------
+SCHEMA_SQL = """
+CREATE TABLE IF NOT EXISTS genai (
+  year           INTEGER,
+  company        TEXT,
+  training_hours REAL,
+  genai_tool     TEXT
+);
+
+CREATE TABLE IF NOT EXISTS genai_year_company (
+  year       INTEGER NOT NULL,
+  company    TEXT    NOT NULL,
+  num_rows   INTEGER NOT NULL,
+  hours_sum  REAL    NOT NULL,
+  hours_rows INTEGER NOT NULL,
+  PRIMARY KEY (year, company)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS genai_year_tool (
+  year           INTEGER NOT NULL,
+  genai_tool     TEXT    NOT NULL,
+  tool_adoptions INTEGER NOT NULL,
+  PRIMARY KEY (year, genai_tool)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS genai_year (
+  year              INTEGER PRIMARY KEY,
+  num_companies     INTEGER NOT NULL,
+  hours_sum         REAL    NOT NULL,
+  hours_rows        INTEGER NOT NULL,
+  most_adopted_tool TEXT,
+  top_adoptions     INTEGER NOT NULL
+);
+"""
+
+# Statement order matters: num_companies is bumped BEFORE the (year, company)
+# row exists, so NOT EXISTS tells us whether this company is new for the year.
+TRIGGER_SQL = """
+CREATE TRIGGER IF NOT EXISTS genai_rollup_ai AFTER INSERT ON genai
+WHEN NEW.year IS NOT NULL
+BEGIN
+  INSERT INTO genai_year (year, num_companies, hours_sum, hours_rows, most_adopted_tool, top_adoptions)
+  VALUES (NEW.year, 0, 0, 0, NULL, 0)
+  ON CONFLICT (year) DO NOTHING;
+
+  UPDATE genai_year
+  SET num_companies = num_companies + (
+        NEW.company IS NOT NULL AND NOT EXISTS (
+          SELECT 1 FROM genai_year_company WHERE year = NEW.year AND company = NEW.company)),
+      hours_sum  = hours_sum + COALESCE(NEW.training_hours, 0),
+      hours_rows = hours_rows + (NEW.training_hours IS NOT NULL)
+  WHERE year = NEW.year;
+
+  INSERT INTO genai_year_company (year, company, num_rows, hours_sum, hours_rows)
+  SELECT NEW.year, NEW.company, 1, COALESCE(NEW.training_hours, 0), NEW.training_hours IS NOT NULL
+  WHERE NEW.company IS NOT NULL
+  ON CONFLICT (year, company) DO UPDATE SET
+    num_rows   = num_rows + 1,
+    hours_sum  = hours_sum + excluded.hours_sum,
+    hours_rows = hours_rows + excluded.hours_rows;
+
+  INSERT INTO genai_year_tool (year, genai_tool, tool_adoptions)
+  SELECT NEW.year, NEW.genai_tool, 1
+  WHERE NEW.genai_tool IS NOT NULL
+  ON CONFLICT (year, genai_tool) DO UPDATE SET tool_adoptions = tool_adoptions + 1;
+
+  -- counts only grow, so the new row's tool is the only possible new mode
+  -- (same tie-break as ROW_NUMBER(): more adoptions, then genai_tool ASC)
+  UPDATE genai_year
+  SET most_adopted_tool = NEW.genai_tool,
+      top_adoptions = (SELECT tool_adoptions FROM genai_year_tool
+                       WHERE year = NEW.year AND genai_tool = NEW.genai_tool)
+  WHERE year = NEW.year
+    AND NEW.genai_tool IS NOT NULL
+    AND (most_adopted_tool IS NULL
+         OR most_adopted_tool = NEW.genai_tool
+         OR (SELECT tool_adoptions FROM genai_year_tool
+             WHERE year = NEW.year AND genai_tool = NEW.genai_tool) > top_adoptions
+         OR ((SELECT tool_adoptions FROM genai_year_tool
+              WHERE year = NEW.year AND genai_tool = NEW.genai_tool) = top_adoptions
+             AND NEW.genai_tool < most_adopted_tool));
+END;
+"""
+
+# Full recompute, used to backfill on install() and after deletes/updates
+REBUILD_SQL = """
+DELETE FROM genai_year_company;
+DELETE FROM genai_year_tool;
+DELETE FROM genai_year;
+
+INSERT INTO genai_year_company (year, company, num_rows, hours_sum, hours_rows)
+SELECT year, company, COUNT(*), COALESCE(SUM(training_hours), 0), COUNT(training_hours)
+FROM genai
+WHERE year IS NOT NULL AND company IS NOT NULL
+GROUP BY year, company;
+
+INSERT INTO genai_year_tool (year, genai_tool, tool_adoptions)
+SELECT year, genai_tool, COUNT(*)
+FROM genai
+WHERE year IS NOT NULL AND genai_tool IS NOT NULL
+GROUP BY year, genai_tool;
+
+INSERT INTO genai_year (year, num_companies, hours_sum, hours_rows, most_adopted_tool, top_adoptions)
+SELECT
+  y.year, y.num_companies, y.hours_sum, y.hours_rows,
+  t.genai_tool, COALESCE(t.tool_adoptions, 0)
+FROM (
+  SELECT year, COUNT(DISTINCT company) AS num_companies,
+         COALESCE(SUM(training_hours), 0) AS hours_sum, COUNT(training_hours) AS hours_rows
+  FROM genai
+  WHERE year IS NOT NULL
+  GROUP BY year
+) y
+LEFT JOIN (
+  SELECT year, genai_tool, tool_adoptions,
+         ROW_NUMBER() OVER (PARTITION BY year ORDER BY tool_adoptions DESC, genai_tool ASC) AS rn
+  FROM genai_year_tool
+) t ON t.year = y.year AND t.rn = 1;
+"""
+
+
+class GenAIRollup:
+    def __init__(self, conn: sqlite3.Connection) -> None:
+        self.conn = conn
+
+    def install(self) -> None:
+        # create everything, then backfill from whatever is already in genai
+        with self.conn:
+            self.conn.executescript(SCHEMA_SQL)
+        self.rebuild()
+        with self.conn:
+            self.conn.executescript(TRIGGER_SQL)
+
+    def rebuild(self) -> None:
+        with self.conn:
+            self.conn.executescript("BEGIN;" + REBUILD_SQL + "COMMIT;")
+
+    def insert_many(self, rows: Iterable[tuple]) -> None:
+        # rows: (year, company, training_hours, genai_tool)
+        with self.conn:
+            self.conn.executemany(
+                "INSERT INTO genai (year, company, training_hours, genai_tool) VALUES (?, ?, ?, ?)",
+                rows,
+            )
+
+    def report(self) -> list[tuple]:
+        return self.conn.execute(ROLLUP_REPORT_SQL).fetchall()
+
+    def report_from_raw(self) -> list[tuple]:
+        return self.conn.execute(REPORT_SQL).fetchall()
+
+    def check_consistency(self, rel_tol: float = 1e-9) -> list[str]:
+        """Compare the rollup report with the original query; returns mismatches."""
+        problems = []
+        expected = [row for row in self.report_from_raw() if row[0] is not None]
+        actual = self.report()
+        if len(expected) != len(actual):
+            problems.append(f"row count: raw={len(expected)} rollup={len(actual)}")
+        for exp, act in zip(expected, actual):
+            year, companies, avg, tool = exp
+            if (year, companies, tool) != (act[0], act[1], act[3]):
+                problems.append(f"year {year}: raw={exp} rollup={act}")
+            elif (avg is None) != (act[2] is None) or (
+                avg is not None and abs(avg - act[2]) > rel_tol * max(1.0, abs(avg))
+            ):
+                problems.append(f"year {year}: avg raw={avg} rollup={act[2]}")
+        return problems
+
+
+if __name__ == "__main__":
+    # sample data from 1_windows-fn.md
+    conn = sqlite3.connect(":memory:")
+    rollup = GenAIRollup(conn)
+    rollup.install()
+    rollup.insert_many([
+        (2023, "A", 10, "ChatGPT"),
+        (2023, "A", 12, "Copilot"),
+        (2023, "B", 8, "ChatGPT"),
+        (2023, "C", 6, "ChatGPT"),
+        (2024, "A", 9, "Copilot"),
+        (2024, "B", 7, "Gemini"),
+        (2024, "B", 11, "Copilot"),
+        (2024, "C", 5, "Copilot"),
+    ])
+    for row in rollup.report():
+        print(row)
+    print("mismatches:", rollup.check_consistency())